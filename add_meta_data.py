@@ -63,9 +63,16 @@ def process_documents():
         stats['total_docs'] = len(doc_ids)
         logging.info(f"找到 {stats['total_docs']} 个文档需要处理")
 
+        # 一次性批量获取所有文档的第一个段落块ID和属性
+        first_paragraph_ids = block_manager.get_first_paragraph_ids(doc_ids)
+        doc_attributes = block_manager.get_blocks_attributes(doc_ids)
+
+        # 待添加元数据的 (文档ID, 目标块ID, 元数据字符串)，检查已有元数据后统一批量插入
+        candidates = []
+
         # 处理每个文档
         for doc_id in doc_ids:
-            attributes = block_manager.get_block_attributes(doc_id)
+            attributes = doc_attributes.get(doc_id)
             if not attributes:
                 logging.warning(f"未能获取文档 {doc_id} 的属性，跳过。")
                 stats['skipped_no_attrs'] += 1
@@ -109,21 +116,32 @@ def process_documents():
             metadata_string = "\n".join(["> " + part for part in metadata_parts]) + "\n\n"
 
             # 获取第一个段落块ID
-            first_paragraph_id = block_manager.get_first_paragraph_id(doc_id)
+            first_paragraph_id = first_paragraph_ids.get(doc_id)
             if not first_paragraph_id:
                 logging.warning(f"文档 {doc_id} 无法获取第一个段落ID，跳过。")
                 stats['skipped_no_paragraph'] += 1
                 continue
 
-            # 检查是否已存在元数据
-            current_content = api_client.call_api("/api/block/getBlockKramdown", {"id": doc_id})
-            if current_content and current_content.get("kramdown") and "为知笔记迁移文档" in current_content["kramdown"]:
+            candidates.append((doc_id, first_paragraph_id, metadata_string))
+
+        # 并发获取候选文档的内容，检查是否已存在元数据
+        doc_kramdowns = block_manager.get_blocks_kramdown([doc_id for doc_id, _, _ in candidates])
+        pending_inserts = []
+        for doc_id, first_paragraph_id, metadata_string in candidates:
+            kramdown = doc_kramdowns.get(doc_id)
+            if kramdown and "为知笔记迁移文档" in kramdown:
                 logging.info(f"文档 {doc_id} 似乎已包含元数据，跳过。")
                 stats['skipped_exists'] += 1
                 continue
 
-            # 添加元数据
-            if block_manager.prepend_metadata_to_block(first_paragraph_id, metadata_string):
+            pending_inserts.append((doc_id, first_paragraph_id, metadata_string))
+
+        # 批量添加元数据
+        results = block_manager.prepend_metadata_to_blocks(
+            [(block_id, metadata) for _, block_id, metadata in pending_inserts]
+        )
+        for (doc_id, _, _), ok in zip(pending_inserts, results):
+            if ok:
                 logging.info(f"成功为文档 {doc_id} 添加元数据。")
                 stats['success'] += 1
             else:
@@ -3,11 +3,13 @@
 import sys
 from datetime import datetime
 from pathlib import Path
-from utilities import ClipboardManager, HTMLConverter
+from utilities import ClipboardManager, HTMLConverter, setup_logging
 from utilities.common import logger
 
 
 def main():
+    setup_logging()
+
     # 1. 读取剪贴板内容
     clipboard = ClipboardManager()
     if not clipboard.is_available():
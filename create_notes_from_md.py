@@ -8,13 +8,13 @@
 4. 运行脚本：python create_notes_from_md.py
 """
 
-import os
 import logging
 from pathlib import Path
 
 # 导入通用函数库
 from utilities import (
     setup_logging,
+    get_env,
     create_siyuan_client,
     create_markdown_importer,
     NotebookManager
@@ -59,8 +59,8 @@ def main(
     """主函数"""
     try:
         # 获取配置
-        api_token = api_token if api_token is not None else os.getenv("SIYUAN_API_TOKEN", "")
-        api_url = api_url if api_url is not None else os.getenv("SIYUAN_API_URL")
+        api_token = api_token if api_token is not None else get_env("SIYUAN_API_TOKEN", "")
+        api_url = api_url if api_url is not None else get_env("SIYUAN_API_URL")
 
         logger.info("=== 思源笔记 MD 文件导入工具 ===")
         logger.info(f"MD文件夹: {md_folder}")
@@ -67,7 +67,7 @@ def compare_notes_in_folders(record_file1: Path, record_file2: Path, exclude_fol
     notes1 = parse_record_file(record_file1)
     notes2 = parse_record_file(record_file2)
 
-    all_folders = set(notes1.keys()) | set(notes2.keys())
+    all_folders = notes1.keys() | notes2.keys()
     diff_lines = []
     for folder in sorted(all_folders):
         if folder in exclude_folders:
@@ -4,6 +4,7 @@
 
 import logging
 import re
+from operator import itemgetter
 from pathlib import Path
 from typing import List, Dict, Optional
 
@@ -39,11 +40,13 @@ def sanitize_filename(filename: str) -> str:
     return filename or 'untitled'
 
 
-def extract_markdown_blocks(page) -> List[Dict[str, str]]:
+def extract_markdown_blocks(page, debug: bool = False) -> List[Dict[str, str]]:
     """
     从飞书文档页面提取 markdown 内容块
     通过点击复制按钮来获取每个块的 markdown 内容
     
+    debug 为 True 时保存完整页面文本用于调试
+    
     返回: List[Dict] 每个字典包含 'title', 'content', 'level' 等信息
     """
     markdown_blocks = []
@@ -785,42 +788,29 @@ def extract_markdown_blocks(page) -> List[Dict[str, str]]:
         }
         """)
         
-        # 无论 JavaScript 提取结果如何，都尝试使用备用方法获取完整文本
-        logger.info("尝试使用备用方法获取完整页面文本...")
-        page_text = page.inner_text('body')
-        
-        # 保存完整页面文本用于调试
-        try:
-            debug_dir = Path('./download/feishu_doc')
-            debug_path = debug_dir / '_full_page_text.txt'
-            debug_path.parent.mkdir(parents=True, exist_ok=True)
-            debug_path.write_text(page_text, encoding='utf-8')
-            logger.info(f"已保存完整页面文本到: {debug_path}")
-        except Exception as e:
-            logger.debug(f"保存调试文本失败: {e}")
-        
-        if page_text.strip():
-            # 检查是否包含编号模式的内容
-            import re
-            number_pattern = re.compile(r'^\s*\d+(\.\d+)+\s+\S+', re.MULTILINE)
-            has_numbered_content = number_pattern.search(page_text)
-            
-            if has_numbered_content:
-                logger.info("在页面文本中发现编号模式，使用备用方法提取...")
-                # 使用备用方法提取
-                markdown_blocks = []
-            elif page_content and len(page_content) > 0:
-                logger.info(f"使用 JavaScript 提取结果: {len(page_content)} 个内容块")
-                markdown_blocks = page_content
-            else:
-                logger.info("使用备用方法提取...")
-                markdown_blocks = []
+        # 仅当 JavaScript 提取结果不足时才获取完整页面文本走备用方法，避免重复提取
+        page_text = ''
+        if page_content and len(page_content) >= 3 and all(b.get('content') for b in page_content):
+            logger.info(f"使用 JavaScript 提取结果: {len(page_content)} 个内容块")
+            markdown_blocks = page_content
         else:
-            if page_content and len(page_content) > 0:
-                logger.info(f"通过 JavaScript 提取到 {len(page_content)} 个内容块")
+            logger.info(f"JavaScript 仅提取到 {len(page_content or [])} 个内容块，使用备用方法获取完整页面文本...")
+            page_text = page.inner_text('body')
+            
+            # 保存完整页面文本用于调试
+            if debug:
+                try:
+                    debug_dir = Path('./download/feishu_doc')
+                    debug_path = debug_dir / '_full_page_text.txt'
+                    debug_path.parent.mkdir(parents=True, exist_ok=True)
+                    debug_path.write_text(page_text, encoding='utf-8')
+                    logger.info(f"已保存完整页面文本到: {debug_path}")
+                except Exception as e:
+                    logger.debug(f"保存调试文本失败: {e}")
+            
+            if not page_text.strip() and page_content:
+                logger.info(f"页面文本为空，使用 JavaScript 提取结果: {len(page_content)} 个内容块")
                 markdown_blocks = page_content
-            else:
-                markdown_blocks = []
         
         # 如果 markdown_blocks 为空，使用备用方法
         if not markdown_blocks:
@@ -908,8 +898,8 @@ def extract_markdown_blocks(page) -> List[Dict[str, str]]:
         
         unique_blocks.append(block)
     
-    # 按索引排序
-    unique_blocks.sort(key=lambda x: x.get('index', 0))
+    # 按索引排序（所有提取分支生成的块都包含 'index' 字段）
+    unique_blocks.sort(key=itemgetter('index'))
     
     logger.info(f"最终提取到 {len(unique_blocks)} 个唯一内容块")
     return unique_blocks
@@ -969,13 +959,24 @@ def save_markdown_blocks(blocks: List[Dict[str, str]], output_dir: Path, base_na
     return saved_files
 
 
-def extract_feishu_markdown(url: str, output_dir: Optional[Path] = None):
+def _write_debug_text(path: Path, text: str) -> bool:
+    """写入调试文件，失败时只记录警告，不影响主流程"""
+    try:
+        path.write_text(text, encoding='utf-8')
+        return True
+    except Exception as e:
+        logger.warning(f"保存调试文件失败 {path}: {e}")
+        return False
+
+
+def extract_feishu_markdown(url: str, output_dir: Optional[Path] = None, debug: bool = False):
     """
     从飞书文档 URL 提取 markdown 内容并保存
     
     Args:
         url: 飞书文档 URL
         output_dir: 输出目录，默认为 ./download/feishu_doc
+        debug: 是否保存完整页面文本等调试文件
     """
     if not HAS_PLAYWRIGHT:
         logger.error("Playwright 未安装，无法执行")
@@ -1025,20 +1026,20 @@ def extract_feishu_markdown(url: str, output_dir: Optional[Path] = None):
                 
                 # 提取 markdown 块
                 logger.info("开始提取内容...")
-                blocks = extract_markdown_blocks(page)
+                blocks = extract_markdown_blocks(page, debug=debug)
                 
                 if not blocks:
                     logger.warning("未找到任何内容块，尝试保存页面 HTML 以供调试")
                     html_content = page.content()
                     debug_path = output_dir / '_debug_page.html'
-                    debug_path.write_text(html_content, encoding='utf-8')
-                    logger.info(f"已保存调试 HTML: {debug_path}")
+                    if _write_debug_text(debug_path, html_content):
+                        logger.info(f"已保存调试 HTML: {debug_path}")
                     
                     # 也保存页面文本
                     page_text = page.inner_text('body')
                     text_path = output_dir / '_debug_page_text.txt'
-                    text_path.write_text(page_text, encoding='utf-8')
-                    logger.info(f"已保存页面文本: {text_path}")
+                    if _write_debug_text(text_path, page_text):
+                        logger.info(f"已保存页面文本: {text_path}")
                 
                 # 保存 markdown 块
                 base_name = 'feishu_doc'
@@ -18,7 +18,10 @@
 
 import sqlite3
 import csv
+import gzip
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 from datetime import datetime
@@ -29,6 +32,19 @@ from utilities import setup_logging, FileManager, COMMON_QUERIES
 # 配置日志
 logger = setup_logging()
 
+# 并行执行全部预设查询时的线程数
+MAX_PRESET_WORKERS = 4
+
+# CSV输出缓冲区大小，大导出时减少 write() 系统调用次数
+CSV_BUFFER_SIZE = 1024 * 1024
+
+# 读多写少的导出场景：内存映射读取 1GiB、页缓存 256MiB、临时表放内存
+_SQLITE_READ_PRAGMAS = (
+    "PRAGMA mmap_size=1073741824; "
+    "PRAGMA cache_size=-262144; "
+    "PRAGMA temp_store=MEMORY;"
+)
+
 
 def quick_export_example():
     """
@@ -45,57 +61,101 @@ def quick_export_example():
         return
 
     try:
-        # 创建查询工具
-        query_tool = SQLiteQueryToCSV(db_path)
-
-        # 创建输出目录
-        output_dir = Path("output")
-        output_dir.mkdir(exist_ok=True)
-
-        # 快速导出最新的100篇文档
-        print("正在导出最新的100篇文档...")
-        simple_query = """
-        SELECT
-            content as 文档标题,
-            hpath as 文档路径,
-            datetime(created/1000, 'unixepoch', 'localtime') as 创建时间,
-            datetime(updated/1000, 'unixepoch', 'localtime') as 更新时间
-        FROM blocks
-        WHERE type = 'd'
-        ORDER BY updated DESC
-        LIMIT 100
-        """
+        # 创建查询工具，结束时关闭数据库连接
+        with SQLiteQueryToCSV(db_path, read_only=True) as query_tool:
+            # 创建输出目录
+            output_dir = Path("output")
+            output_dir.mkdir(exist_ok=True)
+
+            # 快速导出最新的100篇文档
+            print("正在导出最新的100篇文档...")
+            simple_query = """
+            SELECT
+                content as 文档标题,
+                hpath as 文档路径,
+                datetime(created/1000, 'unixepoch', 'localtime') as 创建时间,
+                datetime(updated/1000, 'unixepoch', 'localtime') as 更新时间
+            FROM blocks
+            WHERE type = 'd'
+            ORDER BY updated DESC
+            LIMIT 100
+            """
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = output_dir / f"latest_documents_{timestamp}.csv"
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_file = output_dir / f"latest_documents_{timestamp}.csv"
 
-        success = query_tool.query_to_csv(simple_query, str(output_file))
+            success = query_tool.query_to_csv(simple_query, str(output_file))
 
-        if success:
-            print(f"✓ 导出完成: {output_file}")
-            print("你可以用Excel或其他工具打开这个CSV文件查看结果")
-        else:
-            print("✗ 导出失败")
+            if success:
+                print(f"✓ 导出完成: {output_file}")
+                print("你可以用Excel或其他工具打开这个CSV文件查看结果")
+            else:
+                print("✗ 导出失败")
 
     except Exception as e:
         print(f"错误: {e}")
 
 
+def _fsync_file(path: Path) -> None:
+    """
+    把已关闭文件的内容同步到磁盘
+
+    :param path: 文件路径
+    """
+    # Windows 上 fsync 需要可写句柄，以追加模式打开不会修改内容
+    with open(path, 'ab') as f:
+        os.fsync(f.fileno())
+
+
 class SQLiteQueryToCSV:
     """SQLite数据库查询并导出CSV的工具类"""
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, read_only: bool = False):
         """
         初始化查询工具
 
         :param db_path: 数据库文件路径
+        :param read_only: 是否以只读方式打开数据库，只读时不会对数据库加写锁
         """
         self.db_path = Path(db_path)
         if not self.db_path.exists():
             raise FileNotFoundError(f"数据库文件不存在: {db_path}")
 
+        self.read_only = read_only
+        self._conn = None
         logger.info(f"初始化SQLite查询工具，数据库: {self.db_path}")
 
+    def __enter__(self) -> 'SQLiteQueryToCSV':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        获取共享的数据库连接，首次使用时打开，之后所有查询复用
+
+        :return: SQLite连接
+        """
+        if self._conn is None:
+            if self.read_only:
+                database, uri = f"{self.db_path.resolve().as_uri()}?mode=ro", True
+            else:
+                database, uri = self.db_path, False
+
+            # 自动提交模式，只读查询不会开启隐式事务
+            self._conn = sqlite3.connect(database, uri=uri, isolation_level=None, check_same_thread=False)
+            self._conn.executescript(_SQLITE_READ_PRAGMAS)
+            if self.read_only:
+                self._conn.execute("PRAGMA query_only=1")
+        return self._conn
+
+    def close(self) -> None:
+        """关闭共享的数据库连接"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
     def execute_query(self, sql: str) -> List[Dict[str, Any]]:
         """
         执行SQL查询
@@ -106,22 +166,21 @@ class SQLiteQueryToCSV:
         try:
             logger.info(f"执行SQL查询: {sql}")
 
-            with sqlite3.connect(self.db_path) as conn:
-                # 设置行工厂，使返回结果为字典格式
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
+            cursor = self._get_connection().cursor()
+            # 设置行工厂，使返回结果为字典格式
+            cursor.row_factory = sqlite3.Row
 
-                # 执行查询
-                cursor.execute(sql)
+            # 执行查询
+            cursor.execute(sql)
 
-                # 获取结果
-                rows = cursor.fetchall()
+            # 获取结果
+            rows = cursor.fetchall()
 
-                # 转换为字典列表
-                result = [dict(row) for row in rows]
+            # 转换为字典列表
+            result = [dict(row) for row in rows]
 
-                logger.info(f"查询成功，返回 {len(result)} 条记录")
-                return result
+            logger.info(f"查询成功，返回 {len(result)} 条记录")
+            return result
 
         except sqlite3.Error as e:
             logger.error(f"SQL查询执行失败: {e}")
@@ -130,44 +189,66 @@ class SQLiteQueryToCSV:
             logger.error(f"查询过程中发生错误: {e}")
             raise
 
-    def query_to_csv(self, sql: str, output_file: str, encoding: str = 'utf-8') -> bool:
+    def query_to_csv(self, sql: str, output_file: str, encoding: str = 'utf-8',
+                     batch_size: int = 10000, compress: bool = False, fsync: bool = False) -> bool:
         """
         执行SQL查询并将结果保存为CSV文件
 
+        查询结果按批从游标取出写入文件，内存中最多只保留一批记录
+
         :param sql: SQL查询语句
         :param output_file: 输出CSV文件路径
         :param encoding: 文件编码，默认utf-8
+        :param batch_size: 每批从游标读取的记录数
+        :param compress: 是否输出gzip压缩的CSV，文件名会补上 .gz 后缀
+        :param fsync: 写完后是否调用一次 fsync，确保文件已落盘
         :return: 是否成功
         """
         try:
-            # 执行查询
-            results = self.execute_query(sql)
-
-            if not results:
-                logger.warning("查询结果为空，将创建空的CSV文件")
-                # 创建空文件
-                Path(output_file).touch()
-                return True
+            logger.info(f"执行SQL查询: {sql}")
 
             # 确保输出目录存在
             output_path = Path(output_file)
+            if compress and output_path.suffix != '.gz':
+                output_path = output_path.with_name(output_path.name + '.gz')
             output_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # 写入CSV文件
-            with open(output_path, 'w', newline='', encoding=encoding) as csvfile:
-                # 获取字段名
-                fieldnames = list(results[0].keys())
+            cursor = self._get_connection().execute(sql)
+            cursor.arraysize = batch_size
+
+            # 字段名来自游标描述，结果为空时也能写出表头
+            fieldnames = [column[0] for column in cursor.description or []]
+            row_count = 0
+
+            if compress:
+                # 压缩级别1：压缩率已足够，CPU不会成为瓶颈
+                csvfile = gzip.open(output_path, 'wt', compresslevel=1, newline='', encoding=encoding)
+            else:
+                csvfile = open(output_path, 'w', buffering=CSV_BUFFER_SIZE, newline='', encoding=encoding)
 
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            with csvfile:
+                writer = csv.writer(csvfile)
 
                 # 写入表头
-                writer.writeheader()
+                writer.writerow(fieldnames)
 
-                # 写入数据行
-                writer.writerows(results)
+                # 按批写入数据行
+                while True:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    writer.writerows(rows)
+                    row_count += len(rows)
+
+            if fsync:
+                # 文件关闭后（gzip尾部已写入）只同步一次
+                _fsync_file(output_path)
+
+            if row_count == 0:
+                logger.warning("查询结果为空，CSV文件只包含表头")
 
             logger.info(f"CSV文件已保存到: {output_path}")
-            logger.info(f"共写入 {len(results)} 条记录，{len(fieldnames)} 个字段")
+            logger.info(f"共写入 {row_count} 条记录，{len(fieldnames)} 个字段")
 
             return True
 
@@ -208,7 +289,8 @@ class SQLiteQueryToCSV:
             return []
 
     def export_table_to_csv(self, table_name: str, output_file: str,
-                           limit: Optional[int] = None, encoding: str = 'utf-8') -> bool:
+                           limit: Optional[int] = None, encoding: str = 'utf-8',
+                           compress: bool = False) -> bool:
         """
         导出整张表到CSV文件
 
@@ -216,13 +298,14 @@ class SQLiteQueryToCSV:
         :param output_file: 输出文件路径
         :param limit: 限制导出记录数，None表示全部导出
         :param encoding: 文件编码
+        :param compress: 是否输出gzip压缩的CSV
         :return: 是否成功
         """
         sql = f"SELECT * FROM {table_name}"
         if limit:
             sql += f" LIMIT {limit}"
 
-        return self.query_to_csv(sql, output_file, encoding)
+        return self.query_to_csv(sql, output_file, encoding, compress=compress)
 
 def run_preset_query(query_tool: SQLiteQueryToCSV, query_name: str, output_dir: Path) -> bool:
     """
@@ -246,6 +329,95 @@ def run_preset_query(query_tool: SQLiteQueryToCSV, query_name: str, output_dir:
     return query_tool.query_to_csv(sql, str(output_file))
 
 
+def run_all_preset_queries(query_tool: SQLiteQueryToCSV, output_dir: Path,
+                           max_workers: int = MAX_PRESET_WORKERS) -> Dict[str, bool]:
+    """
+    并行运行所有预设查询，每个线程使用独立的数据库连接
+
+    :param query_tool: 查询工具实例，提供数据库路径与打开方式
+    :param output_dir: 输出目录
+    :param max_workers: 最大并行线程数
+    :return: 预设查询名称到是否成功的映射，顺序与 COMMON_QUERIES 一致
+    """
+    def run_in_own_connection(query_name: str) -> bool:
+        with SQLiteQueryToCSV(str(query_tool.db_path), read_only=query_tool.read_only) as worker_tool:
+            return run_preset_query(worker_tool, query_name, output_dir)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(COMMON_QUERIES, executor.map(run_in_own_connection, COMMON_QUERIES)))
+
+
+def _show_presets(arg: str, query_tool: SQLiteQueryToCSV, output_dir: Path):
+    """交互命令 presets：显示预设查询列表"""
+    print("\n预设查询列表:")
+    for i, name in enumerate(COMMON_QUERIES.keys(), 1):
+        print(f"  {i}. {name}")
+
+
+def _run_preset(arg: str, query_tool: SQLiteQueryToCSV, output_dir: Path):
+    """交互命令 preset <编号>：执行预设查询"""
+    try:
+        preset_num = int(arg.split()[0])
+        preset_names = list(COMMON_QUERIES.keys())
+        if 1 <= preset_num <= len(preset_names):
+            query_name = preset_names[preset_num - 1]
+            success = run_preset_query(query_tool, query_name, output_dir)
+            if success:
+                print(f"预设查询 '{query_name}' 执行完成")
+        else:
+            print(f"无效的预设查询编号: {preset_num}")
+    except (IndexError, ValueError):
+        print("使用方法: preset <编号>")
+
+
+def _show_tables(arg: str, query_tool: SQLiteQueryToCSV, output_dir: Path):
+    """交互命令 tables：显示所有表"""
+    tables = query_tool.get_table_list()
+    print(f"\n数据库表列表: {', '.join(tables)}")
+
+
+def _show_table_info(arg: str, query_tool: SQLiteQueryToCSV, output_dir: Path):
+    """交互命令 info <表名>：显示表结构"""
+    try:
+        table_name = arg.split()[0]
+    except IndexError:
+        print("使用方法: info <表名>")
+        return
+
+    info = query_tool.get_table_info(table_name)
+    if info:
+        print(f"\n表 {table_name} 的结构:")
+        for field in info:
+            print(f"  {field['name']} ({field['type']})")
+    else:
+        print(f"表 {table_name} 不存在或获取信息失败")
+
+
+def _export_table(arg: str, query_tool: SQLiteQueryToCSV, output_dir: Path):
+    """交互命令 export <表名>：导出整张表"""
+    try:
+        table_name = arg.split()[0]
+    except IndexError:
+        print("使用方法: export <表名>")
+        return
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = output_dir / f"table_{table_name}_{timestamp}.csv"
+    success = query_tool.export_table_to_csv(table_name, str(output_file), limit=10000)
+    if success:
+        print(f"表 {table_name} 导出完成")
+
+
+# 交互模式命令表：命令首个单词（小写）-> 处理函数，其余输入按SQL执行
+_INTERACTIVE_COMMANDS = {
+    'presets': _show_presets,
+    'preset': _run_preset,
+    'tables': _show_tables,
+    'info': _show_table_info,
+    'export': _export_table,
+}
+
+
 def interactive_mode(query_tool: SQLiteQueryToCSV, output_dir: Path):
     """
     交互式查询模式
@@ -267,63 +439,20 @@ def interactive_mode(query_tool: SQLiteQueryToCSV, output_dir: Path):
         try:
             command = input("\n请输入命令或SQL语句: ").strip()
 
-            if command.lower() in ['quit', 'exit', 'q']:
-                break
-
             if not command:
                 continue
 
-            # 处理特殊命令
-            if command.lower() == 'presets':
-                print("\n预设查询列表:")
-                for i, name in enumerate(COMMON_QUERIES.keys(), 1):
-                    print(f"  {i}. {name}")
-                continue
-
-            if command.lower().startswith('preset '):
-                try:
-                    preset_num = int(command.split()[1])
-                    preset_names = list(COMMON_QUERIES.keys())
-                    if 1 <= preset_num <= len(preset_names):
-                        query_name = preset_names[preset_num - 1]
-                        success = run_preset_query(query_tool, query_name, output_dir)
-                        if success:
-                            print(f"预设查询 '{query_name}' 执行完成")
-                    else:
-                        print(f"无效的预设查询编号: {preset_num}")
-                except (IndexError, ValueError):
-                    print("使用方法: preset <编号>")
-                continue
-
-            if command.lower() == 'tables':
-                tables = query_tool.get_table_list()
-                print(f"\n数据库表列表: {', '.join(tables)}")
-                continue
+            # 只对首个单词做小写比较，长SQL不必整体转换
+            head, _, arg = command.partition(' ')
+            keyword = head.lower()
 
-            if command.lower().startswith('info '):
-                try:
-                    table_name = command.split()[1]
-                    info = query_tool.get_table_info(table_name)
-                    if info:
-                        print(f"\n表 {table_name} 的结构:")
-                        for field in info:
-                            print(f"  {field['name']} ({field['type']})")
-                    else:
-                        print(f"表 {table_name} 不存在或获取信息失败")
-                except IndexError:
-                    print("使用方法: info <表名>")
-                continue
+            if keyword in ('quit', 'exit', 'q') and not arg:
+                break
 
-            if command.lower().startswith('export '):
-                try:
-                    table_name = command.split()[1]
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    output_file = output_dir / f"table_{table_name}_{timestamp}.csv"
-                    success = query_tool.export_table_to_csv(table_name, str(output_file), limit=10000)
-                    if success:
-                        print(f"表 {table_name} 导出完成")
-                except IndexError:
-                    print("使用方法: export <表名>")
+            # 处理特殊命令
+            handler = _INTERACTIVE_COMMANDS.get(keyword)
+            if handler:
+                handler(arg, query_tool, output_dir)
                 continue
 
             # 执行SQL查询
@@ -350,64 +479,62 @@ def main():
     db_path = r"D:\SiYuan_data\temp\siyuan.db"
 
     try:
-        # 创建查询工具
-        query_tool = SQLiteQueryToCSV(db_path)
-
-        # 获取并显示所有表
-        tables = query_tool.get_table_list()
-        if not tables:
-            print("数据库中没有找到表")
-            return
-
-        print(f"\n数据库中的表: {', '.join(tables)}")
-
-        # 创建输出目录
-        output_dir = Path("output")
-        output_dir.mkdir(exist_ok=True)
-
-        # 选择操作模式
-        print("\n操作模式:")
-        print("1. 执行预设查询")
-        print("2. 交互式查询")
-        print("3. 运行所有预设查询")
-
-        choice = input("请选择操作模式 (1-3): ").strip()
-
-        if choice == "1":
-            print("\n预设查询列表:")
-            preset_names = list(COMMON_QUERIES.keys())
-            for i, name in enumerate(preset_names, 1):
-                print(f"  {i}. {name}")
-
-            try:
-                preset_num = int(input("请选择预设查询编号: ").strip())
-                if 1 <= preset_num <= len(preset_names):
-                    query_name = preset_names[preset_num - 1]
-                    success = run_preset_query(query_tool, query_name, output_dir)
+        # 创建查询工具，所有查询复用同一个数据库连接
+        with SQLiteQueryToCSV(db_path, read_only=True) as query_tool:
+            # 获取并显示所有表
+            tables = query_tool.get_table_list()
+            if not tables:
+                print("数据库中没有找到表")
+                return
+
+            print(f"\n数据库中的表: {', '.join(tables)}")
+
+            # 创建输出目录
+            output_dir = Path("output")
+            output_dir.mkdir(exist_ok=True)
+
+            # 选择操作模式
+            print("\n操作模式:")
+            print("1. 执行预设查询")
+            print("2. 交互式查询")
+            print("3. 运行所有预设查询")
+
+            choice = input("请选择操作模式 (1-3): ").strip()
+
+            if choice == "1":
+                print("\n预设查询列表:")
+                preset_names = list(COMMON_QUERIES.keys())
+                for i, name in enumerate(preset_names, 1):
+                    print(f"  {i}. {name}")
+
+                try:
+                    preset_num = int(input("请选择预设查询编号: ").strip())
+                    if 1 <= preset_num <= len(preset_names):
+                        query_name = preset_names[preset_num - 1]
+                        success = run_preset_query(query_tool, query_name, output_dir)
+                        if success:
+                            print(f"预设查询 '{query_name}' 执行完成")
+                    else:
+                        print(f"无效的预设查询编号: {preset_num}")
+                except ValueError:
+                    print("请输入有效的数字")
+
+            elif choice == "2":
+                interactive_mode(query_tool, output_dir)
+
+            elif choice == "3":
+                print("\n执行所有预设查询...")
+                for query_name, success in run_all_preset_queries(query_tool, output_dir).items():
                     if success:
-                        print(f"预设查询 '{query_name}' 执行完成")
-                else:
-                    print(f"无效的预设查询编号: {preset_num}")
-            except ValueError:
-                print("请输入有效的数字")
-
-        elif choice == "2":
-            interactive_mode(query_tool, output_dir)
-
-        elif choice == "3":
-            print("\n执行所有预设查询...")
-            for query_name in COMMON_QUERIES.keys():
-                success = run_preset_query(query_tool, query_name, output_dir)
-                if success:
-                    print(f"✓ {query_name}")
-                else:
-                    print(f"✗ {query_name}")
-            print("所有预设查询执行完成")
+                        print(f"✓ {query_name}")
+                    else:
+                        print(f"✗ {query_name}")
+                print("所有预设查询执行完成")
 
-        else:
-            print("无效的选择")
+            else:
+                print("无效的选择")
 
-        print("\n程序结束")
+            print("\n程序结束")
 
     except FileNotFoundError as e:
         logger.error(f"文件不存在: {e}")
@@ -14,15 +14,243 @@ import json
 from pathlib import Path
 import re
 
+# 独立脚本只依赖标准库，安装了 orjson 时才用它解析配置文件
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+
+# 快捷键符号映射表
+MAC_TO_WINDOWS_KEYS = {
+    '⌘': 'Ctrl',
+    '⌥': 'Alt',
+    '⇧': 'Shift',
+    '⌃': 'Ctrl',  # Control键
+    '⌫': 'Delete',
+    '⌦': 'Delete',  # Forward Delete
+    '↩': 'Enter',
+    '↑': 'Up',
+    '↓': 'Down',
+    '←': 'Left',
+    '→': 'Right',
+    '⇥': 'Tab',
+    '⎋': 'Esc',
+    '⏎': 'Enter',
+    '⌤': 'Enter',
+    '⌧': 'Clear',
+    '⌴': 'Space',
+    '⌵': 'Space',
+    '⏏': 'Eject'
+}
+
+_MAC_SYMBOL_RE = re.compile('|'.join(map(re.escape, MAC_TO_WINDOWS_KEYS)))
+
+# 匹配时间戳格式: YYYY-M-D H:MM:SS 或 YYYY-MM-DD HH:MM:SS
+_TIMESTAMP_RE = re.compile(r'\s*\d{4}-\d{1,2}-\d{1,2}\s+\d{1,2}:\d{2}:\d{2}\s*')
+
+
+# 类别的中文名称
+CATEGORY_NAMES = {
+    'editor': '编辑器',
+    'general': '通用',
+    'plugin': '插件',
+    'heading': '标题',
+    'insert': '插入',
+    'list': '列表',
+    'table': '表格',
+    'siyuan-drawio-plugin': 'drawio插件',
+    'sy-f-misc': 'f-misc插件',
+    'sy-tomato-plugin': 'tomato插件'
+}
+
+# 功能的中文名称
+FUNCTION_NAMES = {
+    # 通用功能
+    'ai': 'AI',
+    'aiWriting': 'AI编写',
+    'alignCenter': '居中对齐',
+    'alignLeft': '左对齐',
+    'alignRight': '右对齐',
+    'attr': '属性',
+    'backlinks': '反向链接',
+    'collapse': '折叠',
+    'copyBlockEmbed': '复制为嵌入块',
+    'copyBlockRef': '复制为引用块',
+    'copyHPath': '复制层级路径',
+    'copyID': '复制ID',
+    'copyPlainText': '复制纯文本',
+    'copyProtocol': '复制块超链接',
+    'copyProtocolInMd': '复制块Markdown链接',
+    'copyText': '复制文本',
+    'duplicate': '复制为副本',
+    'duplicateCompletely': '复制为完整副本',
+    'exitFocus': '退出焦点',
+    'expand': '展开',
+    'expandDown': '向下扩选',
+    'expandUp': '向上扩选',
+    'fullscreen': '全屏',
+    'graphView': '关系图',
+    'hLayout': '水平布局',
+    'insertAfter': '在后插入',
+    'insertBefore': '在前插入',
+    'insertBottom': '在下方插入',
+    'insertRight': '在右侧插入',
+    'jumpToParent': '跳转到父级块',
+    'jumpToParentNext': '跳转到父级下一个块',
+    'jumpToParentPrev': '跳转到父级上一个块',
+    'ltr': '从左到右',
+    'moveToDown': '向下移动',
+    'moveToUp': '向上移动',
+    'netAssets2LocalAssets': '网络资源转本地资源',
+    'netImg2LocalAsset': '网络图片转本地资源',
+    'newContentFile': '新建文档内容为',
+    'newNameFile': '新建子文档名为',
+    'newNameSettingFile': '新建命名设置文件',
+    'openBy': '打开',
+    'openInNewTab': '在新标签页打开',
+    'optimizeTypography': '优化排版',
+    'outline': '大纲',
+    'preview': '导出预览',
+    'quickMakeCard': '快速制卡',
+    'redo': '重做',
+    'refPopover': '在浮窗中打开',
+    'refTab': '在后台标签页中打开',
+    'refresh': '刷新',
+    'rename': '重命名',
+    'rtl': '从右到左',
+    'showInFolder': '打开文件位置',
+    'spaceRepetition': '间隔重复',
+    'switchAdjust': '切换自适应宽度',
+    'switchReadonly': '切换只读模式',
+    'undo': '撤销',
+    'vLayout': '垂直布局',
+    'wysiwyg': '所见即所得',
+
+    # 标题功能
+    'heading1': '一级标题',
+    'heading2': '二级标题',
+    'heading3': '三级标题',
+    'heading4': '四级标题',
+    'heading5': '五级标题',
+    'heading6': '六级标题',
+    'paragraph': '段落',
+
+    # 插入功能
+    'appearance': '外观',
+    'bold': '粗体',
+    'check': '复选框',
+    'clearInline': '清除内联样式',
+    'code': '代码块',
+    'inline-code': '内联代码',
+    'inline-math': '内联数学公式',
+    'italic': '斜体',
+    'kbd': '键盘按键',
+    'lastUsed': '最后使用',
+    'link': '链接',
+    'list': '无序列表',
+    'mark': '标记',
+    'memo': '备注',
+    'ordered-list': '有序列表',
+    'quote': '引述',
+    'ref': '引用',
+    'strike': '删除线',
+    'sub': '下标',
+    'sup': '上标',
+    'table': '表格',
+    'tag': '标签',
+    'underline': '下划线',
+
+    # 列表功能
+    'checkToggle': '切换复选框勾选状态',
+    'indent': '列表缩进',
+    'outdent': '列表反向缩进',
+
+    # 表格功能
+    'delete-column': '删除列',
+    'delete-row': '删除行',
+    'insertColumnLeft': '在左侧插入列',
+    'insertColumnRight': '在右侧插入列',
+    'insertRowAbove': '在上方插入行',
+    'insertRowBelow': '在下方插入行',
+    'moveToLeft': '向左移',
+    'moveToRight': '向右移',
+
+    # 通用快捷键
+    'addToDatabase': '添加到数据库',
+    'bookmark': '书签',
+    'closeAll': '关闭所有',
+    'closeLeft': '关闭左侧',
+    'closeOthers': '关闭其他',
+    'closeRight': '关闭右侧',
+    'closeTab': '关闭标签页',
+    'closeUnmodified': '关闭未修改的标签页',
+    'commandPanel': '命令面板',
+    'config': '设置',
+    'dailyNote': '日记',
+    'dataHistory': '数据历史',
+    'editReadonly': '只读模式',
+    'enter': '聚焦',
+    'enterBack': '聚焦到上层',
+    'fileTree': '文档树',
+    'globalGraph': '全局关系图',
+    'globalSearch': '全局搜索',
+    'goBack': '后退',
+    'goForward': '前进',
+    'goToEditTabNext': '跳转到下一个编辑标签页',
+    'goToEditTabPrev': '跳转到上一个编辑标签页',
+    'goToTab1': '跳转到标签页1',
+    'goToTab2': '跳转到标签页2',
+    'goToTab3': '跳转到标签页3',
+    'goToTab4': '跳转到标签页4',
+    'goToTab5': '跳转到标签页5',
+    'goToTab6': '跳转到标签页6',
+    'goToTab7': '跳转到标签页7',
+    'goToTab8': '跳转到标签页8',
+    'goToTab9': '跳转到标签页9',
+    'goToTabNext': '跳转到下一个标签页',
+    'goToTabPrev': '跳转到上一个标签页',
+    'inbox': '收集箱',
+    'lockScreen': '锁屏',
+    'mainMenu': '主菜单',
+    'move': '移动',
+    'newFile': '新建文件',
+    'recentDocs': '最近文档',
+    'replace': '替换',
+    'riffCard': '闪卡',
+    'search': '搜索',
+    'selectOpen1': '定位打开的文档',
+    'splitLR': '向右分屏',
+    'splitMoveB': '向下分屏并移动',
+    'splitMoveR': '向右分屏并移动',
+    'splitTB': '向下分屏',
+    'stickSearch': '固定搜索',
+    'syncNow': '立即同步',
+    'tabToWindow': '移动到新窗口',
+    'tag': '标签',
+    'toggleDock': '显示/隐藏停靠栏',
+    'toggleWin': '显示/隐藏窗口',
+    'unsplit': '取消分屏',
+    'unsplitAll': '取消所有分屏',
+
+    # 插件相关
+    'openDrawio': '打开Drawio',
+    'siyuan-drawio-plugindrawio_dock': 'Drawio停靠栏'
+}
+
+
+def _replace_mac_symbol(match):
+    """把匹配到的macOS符号替换为Windows按键名加分隔符"""
+    return MAC_TO_WINDOWS_KEYS[match.group(0)] + '+'
+
 
 def remove_timestamp_from_text(text):
     """移除文本中的时间戳信息，格式如 "2025-5-12 12:15:11" """
     if not text:
         return text
 
-    # 匹配时间戳格式: YYYY-M-D H:MM:SS 或 YYYY-MM-DD HH:MM:SS
-    timestamp_pattern = r'\s*\d{4}-\d{1,2}-\d{1,2}\s+\d{1,2}:\d{2}:\d{2}\s*'
-    result = re.sub(timestamp_pattern, '', text)
+    result = _TIMESTAMP_RE.sub('', text)
     return result.strip()
 
 
@@ -31,35 +259,8 @@ def convert_mac_to_windows_shortcut(shortcut):
     if not shortcut:
         return shortcut
 
-    # 快捷键符号映射表
-    mac_to_windows = {
-        '⌘': 'Ctrl',
-        '⌥': 'Alt',
-        '⇧': 'Shift',
-        '⌃': 'Ctrl',  # Control键
-        '⌫': 'Delete',
-        '⌦': 'Delete',  # Forward Delete
-        '↩': 'Enter',
-        '↑': 'Up',
-        '↓': 'Down',
-        '←': 'Left',
-        '→': 'Right',
-        '⇥': 'Tab',
-        '⎋': 'Esc',
-        '⏎': 'Enter',
-        '⌤': 'Enter',
-        '⌧': 'Clear',
-        '⌴': 'Space',
-        '⌵': 'Space',
-        '⏏': 'Eject'
-    }
-
-    # 替换快捷键符号
-    result = shortcut
-    for mac_symbol, windows_key in mac_to_windows.items():
-        result = result.replace(mac_symbol, windows_key + '+')
-
-    # 清理多余的加号
+    # 一次扫描替换所有快捷键符号，并清理多余的加号
+    result = _MAC_SYMBOL_RE.sub(_replace_mac_symbol, shortcut)
     result = result.replace('++', '+')
     result = result.rstrip('+')
 
@@ -79,8 +280,8 @@ def read_siyuan_config(config_path):
     """读取思源笔记配置文件"""
     try:
         print(f"正在读取配置文件: {config_path}")
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        # 以字节读取后直接解析，安装了 orjson 时由其解析
+        config = json_loads(Path(config_path).read_bytes())
         print("配置文件读取成功")
         return config
     except FileNotFoundError:
@@ -112,60 +313,63 @@ def export_keymap_to_markdown(config, output_path):
     output_file = output_dir / '思源笔记快捷键设置.md'  # 默认文件名
 
     try:
+        # 先在内存中拼好所有行，最后一次性写入文件
+        lines = ['# 思源笔记快捷键设置\n\n']
+
+        # 遍历keymap的主要类别
+        for main_category, sub_categories in keymap.items():
+            # print(f"处理主类别: {main_category}")
+            lines.append(f'## {get_category_name(main_category)}\n\n')
+            lines.append('| 次要类别 | 功能 | 自定义快捷键 | 默认快捷键 |\n')
+            lines.append('|---------|------|------------|----------|\n')
+
+            if main_category == 'editor':
+                # 处理editor结构: editor -> sub_category -> function -> {custom, default}
+                for sub_category, functions in sub_categories.items():
+                    sub_category_name = get_category_name(sub_category)
+
+                    if isinstance(functions, dict):
+                        for function_name, shortcuts in functions.items():
+                            if isinstance(shortcuts, dict):
+                                function_display = get_function_name(function_name)
+                                custom_key = convert_mac_to_windows_shortcut(shortcuts.get('custom', ''))
+                                default_key = convert_mac_to_windows_shortcut(shortcuts.get('default', ''))
+
+                                lines.append(f'| {sub_category_name} | {function_display} | {custom_key} | {default_key} |\n')
+
+            elif main_category == 'general':
+                # 处理general结构: general -> function -> {custom, default}
+                for function_name, shortcuts in sub_categories.items():
+                    if isinstance(shortcuts, dict):
+                        function_display = get_function_name(function_name)
+                        custom_key = convert_mac_to_windows_shortcut(shortcuts.get('custom', ''))
+                        default_key = convert_mac_to_windows_shortcut(shortcuts.get('default', ''))
+
+                        lines.append(f'| - | {function_display} | {custom_key} | {default_key} |\n')
+
+            elif main_category == 'plugin':
+                # 处理plugin结构: plugin -> plugin_name -> function -> {custom, default}
+                for plugin_name, plugin_functions in sub_categories.items():
+                    plugin_display_name = get_category_name(plugin_name)
+
+                    if isinstance(plugin_functions, dict):
+                        for function_name, shortcuts in plugin_functions.items():
+                            if isinstance(shortcuts, dict):
+                                function_display = get_function_name(function_name)
+                                custom_key = convert_mac_to_windows_shortcut(shortcuts.get('custom', ''))
+                                default_key = convert_mac_to_windows_shortcut(shortcuts.get('default', ''))
+
+                                lines.append(f'| {plugin_display_name} | {function_display} | {custom_key} | {default_key} |\n')
+                            else:
+                                # 某些插件功能可能有不同的结构
+                                function_display = get_function_name(function_name)
+                                converted_shortcut = convert_mac_to_windows_shortcut(str(shortcuts))
+                                lines.append(f'| {plugin_display_name} | {function_display} | {converted_shortcut} |  |\n')
+
+            lines.append('\n')
+
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write('# 思源笔记快捷键设置\n\n')
-
-            # 遍历keymap的主要类别
-            for main_category, sub_categories in keymap.items():
-                # print(f"处理主类别: {main_category}")
-                f.write(f'## {get_category_name(main_category)}\n\n')
-                f.write('| 次要类别 | 功能 | 自定义快捷键 | 默认快捷键 |\n')
-                f.write('|---------|------|------------|----------|\n')
-
-                if main_category == 'editor':
-                    # 处理editor结构: editor -> sub_category -> function -> {custom, default}
-                    for sub_category, functions in sub_categories.items():
-                        sub_category_name = get_category_name(sub_category)
-
-                        if isinstance(functions, dict):
-                            for function_name, shortcuts in functions.items():
-                                if isinstance(shortcuts, dict):
-                                    function_display = get_function_name(function_name)
-                                    custom_key = convert_mac_to_windows_shortcut(shortcuts.get('custom', ''))
-                                    default_key = convert_mac_to_windows_shortcut(shortcuts.get('default', ''))
-
-                                    f.write(f'| {sub_category_name} | {function_display} | {custom_key} | {default_key} |\n')
-
-                elif main_category == 'general':
-                    # 处理general结构: general -> function -> {custom, default}
-                    for function_name, shortcuts in sub_categories.items():
-                        if isinstance(shortcuts, dict):
-                            function_display = get_function_name(function_name)
-                            custom_key = convert_mac_to_windows_shortcut(shortcuts.get('custom', ''))
-                            default_key = convert_mac_to_windows_shortcut(shortcuts.get('default', ''))
-
-                            f.write(f'| - | {function_display} | {custom_key} | {default_key} |\n')
-
-                elif main_category == 'plugin':
-                    # 处理plugin结构: plugin -> plugin_name -> function -> {custom, default}
-                    for plugin_name, plugin_functions in sub_categories.items():
-                        plugin_display_name = get_category_name(plugin_name)
-
-                        if isinstance(plugin_functions, dict):
-                            for function_name, shortcuts in plugin_functions.items():
-                                if isinstance(shortcuts, dict):
-                                    function_display = get_function_name(function_name)
-                                    custom_key = convert_mac_to_windows_shortcut(shortcuts.get('custom', ''))
-                                    default_key = convert_mac_to_windows_shortcut(shortcuts.get('default', ''))
-
-                                    f.write(f'| {plugin_display_name} | {function_display} | {custom_key} | {default_key} |\n')
-                                else:
-                                    # 某些插件功能可能有不同的结构
-                                    function_display = get_function_name(function_name)
-                                    converted_shortcut = convert_mac_to_windows_shortcut(str(shortcuts))
-                                    f.write(f'| {plugin_display_name} | {function_display} | {converted_shortcut} |  |\n')
-
-                f.write('\n')
+            f.write(''.join(lines))
 
         print(f"快捷键设置已成功导出到: {output_file}")
         # print("快捷键已转换为Windows系统格式")
@@ -176,199 +380,14 @@ def export_keymap_to_markdown(config, output_path):
 
 def get_category_name(category_key):
     """获取类别的中文名称"""
-    category_names = {
-        'editor': '编辑器',
-        'general': '通用',
-        'plugin': '插件',
-        'heading': '标题',
-        'insert': '插入',
-        'list': '列表',
-        'table': '表格',
-        'siyuan-drawio-plugin': 'drawio插件',
-        'sy-f-misc': 'f-misc插件',
-        'sy-tomato-plugin': 'tomato插件'
-    }
-    return category_names.get(category_key, category_key)
+    return CATEGORY_NAMES.get(category_key, category_key)
 
 
 def get_function_name(function_key):
     """获取功能的中文名称"""
     # 首先移除时间戳
     clean_function_key = remove_timestamp_from_text(function_key)
-
-    function_names = {
-        # 通用功能
-        'ai': 'AI',
-        'aiWriting': 'AI编写',
-        'alignCenter': '居中对齐',
-        'alignLeft': '左对齐',
-        'alignRight': '右对齐',
-        'attr': '属性',
-        'backlinks': '反向链接',
-        'collapse': '折叠',
-        'copyBlockEmbed': '复制为嵌入块',
-        'copyBlockRef': '复制为引用块',
-        'copyHPath': '复制层级路径',
-        'copyID': '复制ID',
-        'copyPlainText': '复制纯文本',
-        'copyProtocol': '复制块超链接',
-        'copyProtocolInMd': '复制块Markdown链接',
-        'copyText': '复制文本',
-        'duplicate': '复制为副本',
-        'duplicateCompletely': '复制为完整副本',
-        'exitFocus': '退出焦点',
-        'expand': '展开',
-        'expandDown': '向下扩选',
-        'expandUp': '向上扩选',
-        'fullscreen': '全屏',
-        'graphView': '关系图',
-        'hLayout': '水平布局',
-        'insertAfter': '在后插入',
-        'insertBefore': '在前插入',
-        'insertBottom': '在下方插入',
-        'insertRight': '在右侧插入',
-        'jumpToParent': '跳转到父级块',
-        'jumpToParentNext': '跳转到父级下一个块',
-        'jumpToParentPrev': '跳转到父级上一个块',
-        'ltr': '从左到右',
-        'moveToDown': '向下移动',
-        'moveToUp': '向上移动',
-        'netAssets2LocalAssets': '网络资源转本地资源',
-        'netImg2LocalAsset': '网络图片转本地资源',
-        'newContentFile': '新建文档内容为',
-        'newNameFile': '新建子文档名为',
-        'newNameSettingFile': '新建命名设置文件',
-        'openBy': '打开',
-        'openInNewTab': '在新标签页打开',
-        'optimizeTypography': '优化排版',
-        'outline': '大纲',
-        'preview': '导出预览',
-        'quickMakeCard': '快速制卡',
-        'redo': '重做',
-        'refPopover': '在浮窗中打开',
-        'refTab': '在后台标签页中打开',
-        'refresh': '刷新',
-        'rename': '重命名',
-        'rtl': '从右到左',
-        'showInFolder': '打开文件位置',
-        'spaceRepetition': '间隔重复',
-        'switchAdjust': '切换自适应宽度',
-        'switchReadonly': '切换只读模式',
-        'undo': '撤销',
-        'vLayout': '垂直布局',
-        'wysiwyg': '所见即所得',
-
-        # 标题功能
-        'heading1': '一级标题',
-        'heading2': '二级标题',
-        'heading3': '三级标题',
-        'heading4': '四级标题',
-        'heading5': '五级标题',
-        'heading6': '六级标题',
-        'paragraph': '段落',
-
-        # 插入功能
-        'appearance': '外观',
-        'bold': '粗体',
-        'check': '复选框',
-        'clearInline': '清除内联样式',
-        'code': '代码块',
-        'inline-code': '内联代码',
-        'inline-math': '内联数学公式',
-        'italic': '斜体',
-        'kbd': '键盘按键',
-        'lastUsed': '最后使用',
-        'link': '链接',
-        'list': '无序列表',
-        'mark': '标记',
-        'memo': '备注',
-        'ordered-list': '有序列表',
-        'quote': '引述',
-        'ref': '引用',
-        'strike': '删除线',
-        'sub': '下标',
-        'sup': '上标',
-        'table': '表格',
-        'tag': '标签',
-        'underline': '下划线',
-
-        # 列表功能
-        'checkToggle': '切换复选框勾选状态',
-        'indent': '列表缩进',
-        'outdent': '列表反向缩进',
-
-        # 表格功能
-        'delete-column': '删除列',
-        'delete-row': '删除行',
-        'insertColumnLeft': '在左侧插入列',
-        'insertColumnRight': '在右侧插入列',
-        'insertRowAbove': '在上方插入行',
-        'insertRowBelow': '在下方插入行',
-        'moveToLeft': '向左移',
-        'moveToRight': '向右移',
-
-        # 通用快捷键
-        'addToDatabase': '添加到数据库',
-        'bookmark': '书签',
-        'closeAll': '关闭所有',
-        'closeLeft': '关闭左侧',
-        'closeOthers': '关闭其他',
-        'closeRight': '关闭右侧',
-        'closeTab': '关闭标签页',
-        'closeUnmodified': '关闭未修改的标签页',
-        'commandPanel': '命令面板',
-        'config': '设置',
-        'dailyNote': '日记',
-        'dataHistory': '数据历史',
-        'editReadonly': '只读模式',
-        'enter': '聚焦',
-        'enterBack': '聚焦到上层',
-        'fileTree': '文档树',
-        'globalGraph': '全局关系图',
-        'globalSearch': '全局搜索',
-        'goBack': '后退',
-        'goForward': '前进',
-        'goToEditTabNext': '跳转到下一个编辑标签页',
-        'goToEditTabPrev': '跳转到上一个编辑标签页',
-        'goToTab1': '跳转到标签页1',
-        'goToTab2': '跳转到标签页2',
-        'goToTab3': '跳转到标签页3',
-        'goToTab4': '跳转到标签页4',
-        'goToTab5': '跳转到标签页5',
-        'goToTab6': '跳转到标签页6',
-        'goToTab7': '跳转到标签页7',
-        'goToTab8': '跳转到标签页8',
-        'goToTab9': '跳转到标签页9',
-        'goToTabNext': '跳转到下一个标签页',
-        'goToTabPrev': '跳转到上一个标签页',
-        'inbox': '收集箱',
-        'lockScreen': '锁屏',
-        'mainMenu': '主菜单',
-        'move': '移动',
-        'newFile': '新建文件',
-        'recentDocs': '最近文档',
-        'replace': '替换',
-        'riffCard': '闪卡',
-        'search': '搜索',
-        'selectOpen1': '定位打开的文档',
-        'splitLR': '向右分屏',
-        'splitMoveB': '向下分屏并移动',
-        'splitMoveR': '向右分屏并移动',
-        'splitTB': '向下分屏',
-        'stickSearch': '固定搜索',
-        'syncNow': '立即同步',
-        'tabToWindow': '移动到新窗口',
-        'tag': '标签',
-        'toggleDock': '显示/隐藏停靠栏',
-        'toggleWin': '显示/隐藏窗口',
-        'unsplit': '取消分屏',
-        'unsplitAll': '取消所有分屏',
-
-        # 插件相关
-        'openDrawio': '打开Drawio',
-        'siyuan-drawio-plugindrawio_dock': 'Drawio停靠栏'
-    }
-    return function_names.get(clean_function_key, clean_function_key)
+    return FUNCTION_NAMES.get(clean_function_key, clean_function_key)
 
 
 if __name__ == "__main__":
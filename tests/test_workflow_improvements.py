@@ -1,8 +1,14 @@
 import asyncio
+import gzip
+import io
+import json
 import os
 from pathlib import Path
+import sqlite3
 import subprocess
 import sys
+import threading
+import time
 from types import SimpleNamespace
 from unittest.mock import Mock
 
@@ -14,9 +20,18 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 import urls_to_siyuan
+import query_to_csv
+from query_to_csv import SQLiteQueryToCSV
 from utilities.api_client import SiyuanAPI
+from utilities.block import BlockManager
+from utilities.document import DocumentManager
+from utilities.file_manager import FileManager
 from utilities.markdown_importer import MarkdownImporter
+from utilities.media_downloader import MediaDownloader
+from utilities.notebook import NotebookManager
+from utilities.tree_processor import TreeProcessor
 from utilities.url_to_markdown import URLToMarkdownConverter
+from utilities.web_downloader import WebDownloader
 
 
 class _DummyResponse:
@@ -30,6 +45,13 @@ class _DummyResponse:
             response.status_code = self.status_code
             raise requests.exceptions.HTTPError(response=response)
 
+    @property
+    def content(self):
+        return json.dumps(self._payload).encode("utf-8")
+
+    def close(self):
+        pass
+
     def json(self):
         return self._payload
 
@@ -41,18 +63,335 @@ def test_siyuan_api_retries_without_auth_header_after_auth_failure(monkeypatch):
         _DummyResponse(200, {"code": 0, "data": {"notebooks": []}}),
     ]
 
-    def fake_post(url, headers, json, timeout):
-        calls.append({"url": url, "headers": dict(headers), "json": json, "timeout": timeout})
-        return responses[len(calls) - 1]
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="expired-token")
 
-    monkeypatch.setattr("utilities.api_client.requests.post", fake_post)
+    def fake_post(url, data, timeout, headers):
+        calls.append({"url": url, "headers": headers, "json": json.loads(data), "timeout": timeout})
+        return responses[len(calls) - 1]
 
-    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="expired-token")
+    monkeypatch.setattr(client.session, "post", fake_post)
 
     assert client.call_api("/api/notebook/lsNotebooks") == {"notebooks": []}
     assert len(calls) == 2
     assert "Authorization" in calls[0]["headers"]
     assert "Authorization" not in calls[1]["headers"]
+    # 认证头只随请求传入，共享会话的默认头从不包含 Authorization
+    assert "Authorization" not in client.session.headers
+    assert client.auth_headers() == {}
+
+
+def test_siyuan_api_context_manager_closes_session(monkeypatch):
+    closed = []
+
+    with SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token") as client:
+        monkeypatch.setattr(client.session, "close", lambda: closed.append(True))
+
+    assert closed == [True]
+
+
+def test_siyuan_api_caches_opt_in_queries_until_invalidated(monkeypatch):
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token")
+    calls = []
+
+    def fake_post(url, data, timeout, headers=None):
+        calls.append(json.loads(data))
+        return _DummyResponse(200, {"code": 0, "data": [{"id": "b1"}]})
+
+    monkeypatch.setattr(client.session, "post", fake_post)
+
+    payload = {"stmt": "SELECT id FROM blocks"}
+    assert client.call_api("/api/query/sql", payload, cache=True) == [{"id": "b1"}]
+    assert client.call_api("/api/query/sql", payload, cache=True) == [{"id": "b1"}]
+    assert len(calls) == 1
+
+    client.call_api("/api/query/sql", payload)
+    assert len(calls) == 2
+
+    client.invalidate_cache()
+    client.call_api("/api/query/sql", payload, cache=True)
+    assert len(calls) == 3
+
+
+def test_siyuan_api_stream_sql_yields_rows(monkeypatch):
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token")
+    body = {"code": 0, "msg": "", "data": [{"id": "a"}, {"id": "b"}]}
+
+    class _StreamResponse(_DummyResponse):
+        def __init__(self):
+            super().__init__(200, body)
+            self.raw = io.BytesIO(self.content)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+    monkeypatch.setattr(client.session, "post", lambda url, data, timeout, headers=None, stream=False: _StreamResponse())
+
+    assert [row["id"] for row in client.stream_sql("SELECT id FROM blocks")] == ["a", "b"]
+
+
+def test_siyuan_api_stream_api_checks_code_and_falls_back_without_auth(monkeypatch, caplog):
+    pytest.importorskip("ijson")
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token")
+    bodies = [
+        (401, {}),
+        (200, {"code": 0, "msg": "", "data": {"tree": [{"id": "a"}, {"id": "b", "children": [1, 2]}]}}),
+        (200, {"code": -1, "msg": "stmt error", "data": [{"id": "stale"}]}),
+    ]
+    sent_headers = []
+
+    class _StreamResponse(_DummyResponse):
+        def __init__(self, status_code, payload):
+            super().__init__(status_code, payload)
+            self.raw = io.BytesIO(self.content)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+    def fake_post(url, data, timeout, headers=None, stream=False):
+        sent_headers.append(headers)
+        return _StreamResponse(*bodies[len(sent_headers) - 1])
+
+    monkeypatch.setattr(client.session, "post", fake_post)
+
+    items = list(client.stream_api("/api/filetree/listDocTree", {}, "data.tree.item"))
+    assert items == [{"id": "a"}, {"id": "b", "children": [1, 2]}]
+    assert "Authorization" in sent_headers[0]
+    assert "Authorization" not in sent_headers[1]
+
+    with caplog.at_level("ERROR"):
+        assert list(client.stream_sql("SELECT id FROM blocks")) == []
+    assert "stmt error" in caplog.text
+
+
+def test_siyuan_api_map_api_runs_calls_in_thread_pool(monkeypatch):
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token")
+
+    def fake_post(url, data, timeout, headers=None):
+        return _DummyResponse(200, {"code": 0, "data": {"echo": json.loads(data)["id"]}})
+
+    monkeypatch.setattr(client.session, "post", fake_post)
+
+    try:
+        results = client.map_api([("/api/attr/getBlockAttrs", {"id": str(i)}) for i in range(20)])
+    finally:
+        client.close()
+
+    assert results == [{"echo": str(i)} for i in range(20)]
+
+
+def test_siyuan_api_call_api_many_preserves_call_order(monkeypatch):
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token")
+
+    async def fake_acall_api(api_path, payload=None, session=None):
+        await asyncio.sleep(0.01 if payload["stmt"] == "slow" else 0)
+        return [{"id": payload["stmt"]}]
+
+    monkeypatch.setattr(client, "acall_api", fake_acall_api)
+
+    results = client.call_api_many([
+        ("/api/query/sql", {"stmt": "slow"}),
+        ("/api/query/sql", {"stmt": "fast"}),
+    ])
+
+    assert results == [[{"id": "slow"}], [{"id": "fast"}]]
+
+
+def test_notebook_manager_caches_notebook_list_between_lookups():
+    calls = []
+
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None):
+            calls.append(api_path)
+            return {"notebooks": [{"id": "nb1", "name": "Inbox", "closed": False}]}
+
+    manager = NotebookManager(_FakeAPI())
+
+    assert manager.get_notebook_id_by_name("Inbox") == "nb1"
+    assert manager.get_notebook_name("nb1") == "Inbox"
+    assert manager.get_notebook_name("missing") == "未知笔记本-missing"
+    assert calls == ["/api/notebook/lsNotebooks"]
+
+    manager.invalidate()
+    manager.list_notebooks()
+    assert len(calls) == 2
+
+
+def test_find_or_create_notebook_reuses_cache_after_creating():
+    calls = []
+
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None):
+            calls.append(api_path)
+            if api_path == "/api/notebook/createNotebook":
+                return {"notebook": {"id": "nb2", "name": payload["name"], "closed": False}}
+            return {"notebooks": [{"id": "nb1", "name": "Inbox", "closed": False}]}
+
+    manager = NotebookManager(_FakeAPI())
+
+    assert manager.find_or_create_notebook("Archive") == "nb2"
+    assert manager.find_or_create_notebook("Archive") == "nb2"
+    assert manager.get_notebook_name("nb2") == "Archive"
+    assert calls == ["/api/notebook/lsNotebooks", "/api/notebook/createNotebook"]
+
+
+def test_get_first_paragraph_ids_uses_one_query_per_batch():
+    stmts = []
+
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None, cache=False):
+            stmts.append(payload["stmt"])
+            return [
+                {"id": "p1", "parent_id": "20240101000000-doc0001"},
+                {"id": "h1", "parent_id": "20240101000000-doc0001"},
+                {"id": "h2", "parent_id": "20240101000000-doc0002"},
+            ]
+
+    result = BlockManager(_FakeAPI()).get_first_paragraph_ids(
+        ["20240101000000-doc0001", "20240101000000-doc0002", "20240101000000-doc0003"]
+    )
+
+    assert result == {
+        "20240101000000-doc0001": "p1",
+        "20240101000000-doc0002": "h2",
+        "20240101000000-doc0003": "20240101000000-doc0003",
+    }
+    assert len(stmts) == 1
+    assert "parent_id IN ('20240101000000-doc0001', '20240101000000-doc0002', '20240101000000-doc0003')" in stmts[0]
+
+
+def test_get_first_paragraph_id_issues_a_single_priority_query():
+    stmts = []
+
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None, cache=False):
+            stmts.append(payload["stmt"])
+            return [{"id": "h1", "type": "h"}] if len(stmts) == 1 else []
+
+    manager = BlockManager(_FakeAPI())
+
+    assert manager.get_first_paragraph_id("20240101000000-doc0001") == "h1"
+    assert manager.get_first_paragraph_id("20240101000000-doc0002") == "20240101000000-doc0002"
+    assert len(stmts) == 2
+    assert "ORDER BY CASE type WHEN 'p' THEN 0" in stmts[0]
+
+
+def test_first_paragraph_single_and_batch_queries_pick_the_same_block():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE blocks (id TEXT, parent_id TEXT, type TEXT, created TEXT)")
+    conn.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?)", [
+        ("c1", "20240101000000-doc0001", "c", "1"),
+        ("b1", "20240101000000-doc0001", "b", "3"),
+        ("l1", "20240101000000-doc0001", "l", "2"),
+        ("t1", "20240101000000-doc0002", "t", "2"),
+        ("c2", "20240101000000-doc0002", "c", "1"),
+    ])
+
+    class _SQLiteAPI:
+        def call_api(self, api_path, payload=None, cache=False):
+            return [dict(row) for row in conn.execute(payload["stmt"])]
+
+    manager = BlockManager(_SQLiteAPI())
+    doc_ids = ["20240101000000-doc0001", "20240101000000-doc0002"]
+
+    assert manager.get_first_paragraph_ids(doc_ids) == {
+        "20240101000000-doc0001": "l1",
+        "20240101000000-doc0002": "c2",
+    }
+    assert [manager.get_first_paragraph_id(doc_id) for doc_id in doc_ids] == ["l1", "c2"]
+
+
+def test_document_id_queries_only_select_the_id_column():
+    stmts = []
+
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None, cache=False):
+            stmts.append(payload["stmt"])
+            return [{"id": "20240101000000-doc0001"}]
+
+        def stream_sql(self, stmt):
+            stmts.append(stmt)
+            return iter([{"id": "20240101000000-doc0001"}])
+
+    manager = DocumentManager(_FakeAPI())
+    manager.get_notebook_docs_by_sql("20240101000000-nbook01")
+    manager.get_docs_in_path("20240101000000-nbook01", "/inbox")
+
+    for stmt in stmts:
+        select_clause = stmt.split("FROM")[0]
+        assert "*" not in select_clause
+        assert "content" not in select_clause
+
+
+def test_prepend_metadata_to_blocks_sends_one_concurrent_batch():
+    batches = []
+
+    class _FakeAPI:
+        def call_api_many(self, calls):
+            batches.append(calls)
+            return [None if payload["nextID"] == "bad" else [{"doOperations": []}] for _, payload in calls]
+
+        def invalidate_cache(self):
+            batches.append("invalidated")
+
+    results = BlockManager(_FakeAPI()).prepend_metadata_to_blocks([("good", "> meta"), ("bad", "> meta")])
+
+    assert results == [True, False]
+    assert len(batches[0]) == 2
+    assert batches[0][0] == (
+        "/api/block/insertBlock",
+        {"dataType": "markdown", "data": "> meta", "nextID": "good", "parentID": "", "previousID": ""},
+    )
+    assert batches[1] == "invalidated"
+
+
+def test_get_docs_in_path_queries_whole_notebook_for_root_path():
+    stmts = []
+
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None, cache=False):
+            stmts.append(payload["stmt"])
+            return [{"id": "20240101000000-doc0001"}]
+
+    manager = DocumentManager(_FakeAPI())
+
+    assert manager.get_docs_in_path("20240101000000-nbook01", "/") == ["20240101000000-doc0001"]
+    assert "hpath" not in stmts[0]
+
+    manager.get_docs_in_path("20240101000000-nbook01", "/inbox/")
+    assert "hpath = '/inbox' OR hpath LIKE '/inbox/%'" in stmts[1]
+
+
+def test_block_manager_rejects_malformed_ids_before_querying():
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None, cache=False):
+            raise AssertionError("should not query with a malformed id")
+
+    with pytest.raises(ValueError):
+        BlockManager(_FakeAPI()).get_block_markdown("x' OR '1'='1")
+
+
+def test_tree_processor_counts_documents_including_self_entries():
+    tree = {
+        "folder": {
+            "__self__": {"guid-folder": "Folder"},
+            "guid-a": "A",
+            "sub": {"guid-b": "B", "guid-c": "C"},
+        },
+        "guid-d": "D",
+    }
+
+    assert TreeProcessor.count_documents(tree) == 5
+    assert TreeProcessor.count_documents({}) == 0
+    assert TreeProcessor.is_leaf_node({"guid-a": "A", "guid-b": "B"})
+    assert not TreeProcessor.is_leaf_node(tree["folder"])
+    assert not TreeProcessor.is_leaf_node("guid-a")
 
 
 def test_step2_import_to_siyuan_returns_false_when_import_reports_errors(monkeypatch):
@@ -238,6 +577,360 @@ def test_process_markdown_media_handles_adjacent_images_without_greedy_match(tmp
 
     content = "![](media/a.png)![](media/b.png)"
 
-    processed = importer.process_markdown_media(content, md_file)
+    processed, upload_count = importer.process_markdown_media(content, md_file)
 
     assert processed == "![](assets/a.png)![](assets/b.png)"
+    assert upload_count == 2
+
+
+def test_import_md_files_creates_documents_concurrently(tmp_path, monkeypatch):
+    (tmp_path / "a.md").write_text("A", encoding="utf-8")
+    (tmp_path / "b.md").write_text("B", encoding="utf-8")
+    created = []
+
+    async def fake_acall_api(api_path, payload=None, session=None):
+        created.append(payload["path"])
+        return None if payload["path"].endswith("/b") else "doc-" + payload["markdown"]
+
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token")
+    monkeypatch.setattr(client, "acall_api", fake_acall_api)
+    importer = MarkdownImporter(client)
+    importer.notebook_manager = SimpleNamespace(find_or_create_notebook=lambda name: "nb1")
+
+    result = importer.import_md_files(str(tmp_path), "Inbox", upload_media=False)
+
+    assert sorted(created) == ["/a", "/b"]
+    assert result["success"] == 1
+    assert result["error"] == 1
+    assert result["total"] == 2
+
+
+def test_import_md_files_falls_back_to_sequential_inside_running_loop(tmp_path, monkeypatch):
+    (tmp_path / "a.md").write_text("A", encoding="utf-8")
+    created = []
+
+    def fake_call_api(api_path, payload=None, cache=False):
+        created.append(payload["path"])
+        return "doc-a"
+
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token")
+    monkeypatch.setattr(client, "call_api", fake_call_api)
+    importer = MarkdownImporter(client)
+    importer.notebook_manager = SimpleNamespace(find_or_create_notebook=lambda name: "nb1")
+
+    async def caller():
+        return importer.import_md_files(str(tmp_path), "Inbox", upload_media=False)
+
+    result = asyncio.run(caller())
+
+    assert created == ["/a"]
+    assert result["success"] == 1
+    assert result["total"] == 1
+
+
+def test_import_md_files_shares_one_upload_pool_across_documents(tmp_path, monkeypatch):
+    for name in "abcd":
+        (tmp_path / f"{name}.md").write_text(f"![](m{name}1.png)![](m{name}2.png)", encoding="utf-8")
+        (tmp_path / f"m{name}1.png").write_bytes(b"1")
+        (tmp_path / f"m{name}2.png").write_bytes(b"2")
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def upload_asset(path):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return f"assets/{Path(path).name}"
+
+    async def fake_acall_api(api_path, payload=None, session=None):
+        return "doc"
+
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token")
+    monkeypatch.setattr(client, "acall_api", fake_acall_api)
+    importer = MarkdownImporter(client)
+    importer.MAX_UPLOAD_WORKERS = 2
+    importer.notebook_manager = SimpleNamespace(find_or_create_notebook=lambda name: "nb1")
+    importer.media_manager = SimpleNamespace(upload_asset=upload_asset)
+
+    result = importer.import_md_files(str(tmp_path), "Inbox", convert_soft_breaks=False)
+
+    assert result["success"] == 4
+    assert result["media_uploaded"] == 8
+    assert active["peak"] <= 2
+
+
+def test_convert_soft_breaks_skips_code_blocks_and_markdown_syntax():
+    importer = MarkdownImporter(api_client=object())
+    content = "line one\nline two\n- item\n```\ncode a\ncode b\n```\nlast a\nlast b"
+
+    converted = importer.convert_soft_breaks_to_hard_breaks(content)
+
+    assert converted == "line one\n\nline two\n- item\n```\ncode a\ncode b\n```\nlast a\n\nlast b"
+
+
+def test_process_markdown_media_uploads_each_file_once(tmp_path):
+    md_file = tmp_path / "article.md"
+    (tmp_path / "a.png").write_bytes(b"a")
+    (tmp_path / "b.mp3").write_bytes(b"b")
+    uploads = []
+
+    def upload_asset(path):
+        uploads.append(Path(path).name)
+        return f"assets/{Path(path).name}"
+
+    importer = MarkdownImporter(api_client=object())
+    importer.media_manager = SimpleNamespace(
+        is_media_file=lambda path: True,
+        upload_asset=upload_asset,
+        get_media_type=lambda path: "image" if path.endswith(".png") else "audio",
+    )
+
+    content = "![x](a.png)\n![y](a.png)\n![](b.mp3)\n![](missing.png)"
+
+    processed, upload_count = importer.process_markdown_media(content, md_file)
+
+    assert sorted(uploads) == ["a.png", "b.mp3"]
+    assert processed == "![x](assets/a.png)\n![y](assets/a.png)\n[b.mp3](assets/b.mp3)\n![](missing.png)"
+    assert upload_count == 3
+
+
+def test_create_parent_folder_checks_all_levels_in_one_query():
+    stmts = []
+    probed = []
+    created = []
+
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None, cache=False):
+            if api_path == "/api/query/sql":
+                stmts.append(payload["stmt"])
+                return [{"id": "doc-a", "hpath": "/a"}]
+            if api_path == "/api/filetree/getIDsByHPath":
+                probed.append(payload["path"])
+                return []
+            created.append(payload["path"])
+            return "doc-" + payload["path"]
+
+        def invalidate_cache(self):
+            pass
+
+    importer = MarkdownImporter(_FakeAPI())
+
+    assert importer._create_parent_folder("20240101000000-nbook01", "a/b/c/") == "doc-/a/b/c"
+    assert len(stmts) == 1
+    assert "hpath IN ('/a', '/a/b', '/a/b/c')" in stmts[0]
+    # 只需确认第一个未命中的层级，其下层级必然不存在
+    assert probed == ["/a/b"]
+    assert created == ["/a/b", "/a/b/c"]
+
+
+def test_create_parent_folder_confirms_sql_misses_before_creating():
+    created = []
+
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None, cache=False):
+            if api_path == "/api/query/sql":
+                # 刚创建的父文档尚未进入SQL索引
+                return []
+            if api_path == "/api/filetree/getIDsByHPath":
+                return ["doc-a"] if payload["path"] == "/a" else []
+            created.append(payload["path"])
+            return "doc-" + payload["path"]
+
+        def invalidate_cache(self):
+            pass
+
+    importer = MarkdownImporter(_FakeAPI())
+
+    assert importer._create_parent_folder("20240101000000-nbook01", "a/b") == "doc-/a/b"
+    assert created == ["/a/b"]
+
+
+def test_block_reads_are_cached_until_a_block_is_written(monkeypatch):
+    client = SiyuanAPI(api_url="http://127.0.0.1:6806", api_token="token")
+    paths = []
+
+    def fake_post(url, data, timeout, headers=None):
+        paths.append(url.rsplit("/api/", 1)[1])
+        return _DummyResponse(200, {"code": 0, "data": {"title": "Doc"}})
+
+    monkeypatch.setattr(client.session, "post", fake_post)
+    manager = BlockManager(client)
+
+    manager.get_block_attributes("20240101000000-doc0001")["custom-x"] = "mutated"
+    attrs = manager.get_block_attributes("20240101000000-doc0001")
+    attrs.pop("title")
+    assert manager.get_block_attributes("20240101000000-doc0001") == {"title": "Doc"}
+    assert paths == ["attr/getBlockAttrs"]
+
+    manager.prepend_metadata_to_block("20240101000000-blk0001", "> meta")
+    manager.get_block_attributes("20240101000000-doc0001")
+    assert paths == ["attr/getBlockAttrs", "block/insertBlock", "attr/getBlockAttrs"]
+
+    # 未经 BlockManager 的写操作同样会清空缓存
+    client.call_api("/api/attr/setBlockAttrs", {"id": "20240101000000-doc0001", "attrs": {"custom-x": "1"}})
+    manager.get_block_attributes("20240101000000-doc0001")
+    client.call_api("/api/query/sql", {"stmt": "SELECT 1"})
+    manager.get_block_attributes("20240101000000-doc0001")
+    assert paths[3:] == ["attr/setBlockAttrs", "attr/getBlockAttrs", "query/sql"]
+
+
+def test_get_blocks_attributes_reads_titles_and_attributes_in_one_query():
+    stmts = []
+
+    class _FakeAPI:
+        def call_api(self, api_path, payload=None, cache=False):
+            stmts.append(payload["stmt"])
+            return [
+                {"block_id": "20240101000000-doc0001", "name": "title", "value": "Doc"},
+                {"block_id": "20240101000000-doc0001", "name": "custom-url", "value": "https://a"},
+                {"block_id": "20240101000000-doc0002", "name": "title", "value": "Empty"},
+            ]
+
+        def map_api(self, calls):
+            raise AssertionError("map_api should only be used when the query fails")
+
+    result = BlockManager(_FakeAPI()).get_blocks_attributes(
+        ["20240101000000-doc0001", "20240101000000-doc0002", "20240101000000-doc0003"]
+    )
+
+    assert result == {
+        "20240101000000-doc0001": {"title": "Doc", "custom-url": "https://a"},
+        "20240101000000-doc0002": {"title": "Empty"},
+        "20240101000000-doc0003": None,
+    }
+    assert len(stmts) == 1
+
+
+def test_block_manager_fetches_kramdown_through_map_api():
+    class _FakeAPI:
+        def map_api(self, calls):
+            return [{"kramdown": "k-" + calls[0][1]["id"]}, None]
+
+    manager = BlockManager(_FakeAPI())
+
+    assert manager.get_blocks_kramdown(["d1", "d2"]) == {"d1": "k-d1", "d2": None}
+
+
+def test_query_to_csv_streams_rows_over_one_connection(tmp_path):
+    db_path = tmp_path / "siyuan.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE blocks (id TEXT, content TEXT)")
+        conn.executemany("INSERT INTO blocks VALUES (?, ?)", [("a", "x,1"), ("b", "y")])
+    conn.close()
+
+    with SQLiteQueryToCSV(str(db_path)) as query_tool:
+        assert query_tool.query_to_csv("SELECT * FROM blocks", str(tmp_path / "all.csv"))
+        assert query_tool.query_to_csv("SELECT * FROM blocks WHERE 0", str(tmp_path / "empty.csv"))
+        connection = query_tool._conn
+        assert query_tool.get_table_list() == ["blocks"]
+        assert query_tool._conn is connection
+
+    assert query_tool._conn is None
+    assert (tmp_path / "all.csv").read_text(encoding="utf-8").splitlines() == ["id,content", 'a,"x,1"', "b,y"]
+    assert (tmp_path / "empty.csv").read_text(encoding="utf-8").splitlines() == ["id,content"]
+
+
+def test_query_to_csv_read_only_rejects_writes(tmp_path):
+    db_path = tmp_path / "siyuan.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE blocks (id TEXT)")
+    conn.close()
+
+    with SQLiteQueryToCSV(str(db_path), read_only=True) as query_tool:
+        assert query_tool.get_table_list() == ["blocks"]
+        with pytest.raises(sqlite3.OperationalError):
+            query_tool.execute_query("INSERT INTO blocks VALUES ('a')")
+
+
+def test_run_all_preset_queries_uses_a_connection_per_query(tmp_path, monkeypatch):
+    db_path = tmp_path / "siyuan.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE blocks (id TEXT)")
+        conn.execute("INSERT INTO blocks VALUES ('a')")
+    conn.close()
+    monkeypatch.setattr(query_to_csv, "COMMON_QUERIES", {
+        "first": "SELECT id FROM blocks",
+        "second": "SELECT COUNT(*) AS total FROM blocks",
+        "broken": "SELECT * FROM missing_table",
+    })
+
+    with SQLiteQueryToCSV(str(db_path), read_only=True) as query_tool:
+        results = query_to_csv.run_all_preset_queries(query_tool, tmp_path / "out")
+        assert query_tool._conn is None
+
+    assert results == {"first": True, "second": True, "broken": False}
+    assert len(list((tmp_path / "out").glob("*.csv"))) == 2
+
+
+def test_query_to_csv_can_write_gzip_output(tmp_path):
+    db_path = tmp_path / "siyuan.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE blocks (id TEXT, content TEXT)")
+        conn.execute("INSERT INTO blocks VALUES ('a', '内容')")
+    conn.close()
+
+    with SQLiteQueryToCSV(str(db_path)) as query_tool:
+        assert query_tool.export_table_to_csv("blocks", str(tmp_path / "blocks.csv"), compress=True)
+
+    assert not (tmp_path / "blocks.csv").exists()
+    with gzip.open(tmp_path / "blocks.csv.gz", "rt", encoding="utf-8", newline="") as f:
+        assert f.read().splitlines() == ["id,content", "a,内容"]
+
+
+def test_web_downloader_reuses_one_session_with_site_headers(monkeypatch):
+    downloader = WebDownloader()
+    calls = []
+
+    def fake_get(url, headers, timeout):
+        calls.append((url, headers))
+        return SimpleNamespace(
+            content="<html><body><p>内容</p></body></html>".encode("utf-8"),
+            headers={},
+            encoding="utf-8",
+            raise_for_status=lambda: None,
+        )
+
+    monkeypatch.setattr(downloader.session, "get", fake_get)
+
+    assert "内容" in downloader.fetch_webpage("https://example.com/a")
+    assert "内容" in downloader.fetch_webpage("https://www.toutiao.com/article/1")
+    assert [url for url, _ in calls] == ["https://example.com/a", "https://www.toutiao.com/article/1"]
+    assert "Sec-Fetch-User" in calls[1][1] and "Sec-Fetch-User" not in calls[0][1]
+
+
+def test_media_downloader_reuses_shared_session_across_batches(tmp_path, monkeypatch):
+    downloader = MediaDownloader(tmp_path)
+    sessions = []
+
+    async def fake_download(session, url, base_url=""):
+        sessions.append(session)
+        return str(tmp_path / "media" / "a.png"), f"media/{url[-5:]}"
+
+    monkeypatch.setattr(downloader, "download_media_async", fake_download)
+
+    async def run():
+        async with downloader.shared_session() as session:
+            first = await downloader.download_media_batch(["https://cdn.example.com/1.png"])
+            second = await downloader.download_media_batch(["https://cdn.example.com/2.png"])
+        return session, first, second
+
+    session, first, second = asyncio.run(run())
+
+    assert first == {"https://cdn.example.com/1.png": "media/1.png"}
+    assert second == {"https://cdn.example.com/2.png": "media/2.png"}
+    assert sessions == [session, session]
+    assert session.closed and downloader._session is None
+
+
+def test_save_json_file_recreates_output_dir_removed_after_first_save(tmp_path):
+    out_dir = tmp_path / "out"
+
+    assert FileManager.save_json_file({"a": 1}, str(out_dir / "first.json"))
+    (out_dir / "first.json").unlink()
+    out_dir.rmdir()
+
+    assert FileManager.save_json_file({"b": 2}, str(out_dir / "second.json"))
+    assert FileManager.load_json_file(str(out_dir / "second.json")) == {"b": 2}
@@ -4,6 +4,7 @@
 """
 
 from .api_client import SiyuanAPI
+from .async_api_client import AsyncSiyuanAPI
 from .notebook import NotebookManager
 from .document import DocumentManager
 from .block import BlockManager
@@ -11,7 +12,8 @@ from .file_manager import FileManager
 from .tree_processor import TreeProcessor
 from .markdown_importer import MarkdownImporter
 from .media_manager import MediaManager
-from .common import setup_logging, DEFAULT_API_URL, DEFAULT_API_TOKEN
+from . import common
+from .common import setup_logging, load_env, get_env
 from .sql_queries import (
     COMMON_QUERIES, TABLE_QUERIES,
     get_query_by_name, get_all_query_names,
@@ -26,6 +28,12 @@ from .media_downloader import MediaDownloader
 from .clipboard_manager import ClipboardManager
 from .url_to_markdown import URLToMarkdownConverter
 
+def __getattr__(name: str):
+    # DEFAULT_API_URL / DEFAULT_API_TOKEN 延迟到首次访问时才加载 .env
+    if name in ('DEFAULT_API_URL', 'DEFAULT_API_TOKEN'):
+        return getattr(common, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # 便捷函数
 def create_siyuan_client(api_url: str = None, api_token: str = None) -> SiyuanAPI:
     """创建思源API客户端"""
@@ -63,6 +71,7 @@ def create_url_to_markdown_converter(output_dir: str = "output", converter_lib:
 __all__ = [
     # 思源笔记相关
     'SiyuanAPI',
+    'AsyncSiyuanAPI',
     'NotebookManager',
     'DocumentManager',
     'BlockManager',
@@ -71,6 +80,8 @@ __all__ = [
     'MarkdownImporter',
     'MediaManager',
     'setup_logging',
+    'load_env',
+    'get_env',
     'DEFAULT_API_URL',
     'DEFAULT_API_TOKEN',
     'create_siyuan_client',
@@ -1,28 +1,122 @@
 """
 思源笔记API客户端
 """
+import asyncio
+import copy
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+import aiohttp
 import requests
-from typing import Dict, Any, Optional
-from .common import DEFAULT_API_URL, DEFAULT_API_TOKEN, logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from .common import get_env, logger, json_dumps, json_loads
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+
+# 只读接口名前缀；其余接口一律视为写操作，调用后清空查询结果缓存
+_READ_API_PREFIXES = ("get", "ls", "list", "search", "sql", "version")
+
+
+def _is_read_api(api_path: str) -> bool:
+    """判断API是否为只读接口，例如 /api/attr/getBlockAttrs、/api/query/sql"""
+    return api_path.rsplit("/", 1)[-1].startswith(_READ_API_PREFIXES)
 
 
 class SiyuanAPI:
     """思源笔记API操作类"""
 
-    def __init__(self, api_url: str = None, api_token: str = None):
+    # 异步批量调用的最大并发数
+    MAX_CONCURRENT_CALLS = 16
+    # 查询结果缓存的最大条目数
+    CACHE_MAX_ENTRIES = 1024
+    # 线程池批量调用的工作线程数（不超过连接池 pool_maxsize）
+    MAX_WORKER_THREADS = 8
+
+    def __init__(self, api_url: str = None, api_token: str = None, http2: bool = False):
         """
         初始化API客户端
 
         :param api_url: API地址
         :param api_token: API Token
+        :param http2: 是否使用 httpx 的 HTTP/2 客户端（适用于远程 HTTPS 思源服务，需安装 httpx[http2]）
         """
-        self.api_url = api_url or DEFAULT_API_URL
-        self.api_token = api_token or DEFAULT_API_TOKEN
+        self.api_url = api_url or get_env("SIYUAN_API_URL", "http://127.0.0.1:6806")
+        self.api_token = api_token or get_env("SIYUAN_API_TOKEN")
 
-        self.headers = {"Content-Type": "application/json"}
         self._auth_mode = "token" if self.api_token else "none"
-        if self._auth_mode == "token":
-            self.headers["Authorization"] = f"Token {self.api_token}"
+        self.headers = self._build_headers(self._auth_mode == "token")
+
+        self._transport_errors = (requests.exceptions.RequestException,)
+        # 请求体由 json_dumps 预先序列化为字节串；requests 用 data 参数，httpx 用 content 参数
+        self._body_arg = "data"
+        self.session = self._create_http2_client() if http2 else None
+        if self.session is None:
+            self.session = self._create_requests_session()
+
+        # 只读查询结果缓存（LRU），键为 (api_path, 序列化后的payload)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # 线程池在首次调用 map_api 时创建
+        self._executor = None
+
+    def _create_requests_session(self) -> requests.Session:
+        """创建带连接池的 requests 会话，避免每次请求都重新建立TCP连接"""
+        session = requests.Session()
+        # 只在建立连接失败（请求尚未发出）时由 urllib3 退避重试；读超时、5xx 等请求可能已被执行的情况不重试，
+        # 避免重复执行创建文档等非幂等写操作，也避免重发已被读完的流式上传请求体
+        retry = Retry(
+            total=3,
+            connect=3,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=0.1
+        )
+        # pool_maxsize 应不小于同时通过本会话发请求的线程数（map_api 使用 MAX_WORKER_THREADS 个线程），
+        # 超出部分的连接用完即关闭，不会阻塞
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        # 认证头随每个请求单独传入，会话默认头不含 Authorization，线程间互不影响
+        session.headers.update(self._build_headers(False))
+        return session
+
+    def _create_http2_client(self):
+        """创建 HTTP/2 多路复用客户端，依赖缺失时返回None"""
+        if not HAS_HTTPX:
+            logger.warning("未安装 httpx，HTTP/2 不可用，回退为 requests 连接池")
+            return None
+
+        try:
+            client = httpx.Client(
+                http2=True,
+                headers=self._build_headers(False),
+                timeout=30,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+            )
+        except ImportError:
+            logger.warning("未安装 h2，HTTP/2 不可用，回退为 requests 连接池（pip install httpx[http2]）")
+            return None
+
+        self._transport_errors = (requests.exceptions.RequestException, httpx.HTTPError)
+        self._body_arg = "content"
+        return client
 
     def _build_headers(self, include_auth: bool) -> Dict[str, str]:
         headers = {"Content-Type": "application/json"}
@@ -30,39 +124,237 @@ class SiyuanAPI:
             headers["Authorization"] = f"Token {self.api_token}"
         return headers
 
-    def call_api(self, api_path: str, payload: dict = None) -> Optional[dict]:
+    def auth_headers(self) -> Dict[str, str]:
+        """当前认证模式下每个请求需附加的认证头，无认证模式为空字典"""
+        if self._auth_mode == "token" and self.api_token:
+            return {"Authorization": f"Token {self.api_token}"}
+        return {}
+
+    def invalidate_cache(self) -> None:
+        """清空查询结果缓存，在写入操作后调用"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        """关闭底层HTTP会话和线程池，释放连接"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+
+    def __enter__(self) -> 'SiyuanAPI':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def call_api(self, api_path: str, payload: dict = None, cache: bool = False) -> Optional[dict]:
         """
         调用思源笔记API的通用函数
 
         :param api_path: API路径，例如 "/api/notebook/lsNotebooks"
         :param payload: 请求体数据 (dict)
+        :param cache: 是否缓存结果，仅用于只读查询（如 /api/query/sql）
         :return: 成功则返回API响应的data部分，否则返回None
         """
+        if payload is None:
+            payload = {}
+
+        cache_key = None
+        if cache:
+            cache_key = (api_path, json.dumps(payload, sort_keys=True, ensure_ascii=False))
+            with self._cache_lock:
+                if cache_key in self._cache:
+                    self._cache.move_to_end(cache_key)
+                    # 返回副本，调用方修改结果不会污染缓存
+                    return copy.deepcopy(self._cache[cache_key])
+
+        data = self._post(api_path, payload)
+        # 任何写操作（setBlockAttrs、updateBlock、removeBlock 等）都可能使缓存的读取结果过期
+        if not _is_read_api(api_path):
+            self.invalidate_cache()
+
+        if cache_key is not None and data is not None:
+            with self._cache_lock:
+                self._cache[cache_key] = copy.deepcopy(data)
+                if len(self._cache) > self.CACHE_MAX_ENTRIES:
+                    self._cache.popitem(last=False)
+
+        return data
+
+    def _send_post(self, api_path: str, body: bytes, **kwargs):
+        """
+        发送POST请求，认证头逐请求传入（不修改共享会话的默认头，map_api 的并发线程互不干扰），
+        Token被拒绝(401)时回退为无认证模式重试
+
+        :param api_path: API路径
+        :param body: 已序列化的请求体
+        :param kwargs: 传给 session.post 的其他参数，例如 stream=True
+        :return: 响应对象
+        """
+        url = f"{self.api_url}{api_path}"
+        include_auth = self._auth_mode == "token"
+        request_body = {self._body_arg: body}
+        response = self.session.post(url, headers=self._build_headers(include_auth), timeout=30,
+                                     **request_body, **kwargs)
+        if response.status_code == 401 and include_auth:
+            logger.warning("接口 %s 拒绝 Authorization 头，回退为无认证模式重试", api_path)
+            response.close()
+            response = self.session.post(url, headers=self._build_headers(False), timeout=30,
+                                         **request_body, **kwargs)
+            if response.status_code < 400:
+                self._auth_mode = "none"
+                self.headers = self._build_headers(False)
+        return response
+
+    def _post(self, api_path: str, payload: dict) -> Optional[dict]:
+        """发送请求并解析思源API响应，失败返回None"""
         try:
-            if payload is None:
-                payload = {}
-
-            include_auth = self._auth_mode == "token"
-            response = requests.post(
-                f"{self.api_url}{api_path}",
-                headers=self._build_headers(include_auth),
-                json=payload,
-                timeout=30
+            response = self._send_post(api_path, json_dumps(payload))
+            response.raise_for_status()
+            json_response = json_loads(response.content)
+
+            if json_response.get("code") != 0:
+                logger.error(f"调用API {api_path} 出错: {json_response.get('msg')}")
+                return None
+
+            return json_response.get("data")
+
+        except self._transport_errors + (ValueError,) as e:
+            logger.error(f"请求API {api_path} 失败: {e}")
+            return None
+
+    def map_api(self, calls: List[Tuple[str, Optional[dict]]]) -> List[Optional[dict]]:
+        """
+        用线程池并发执行多个同步API调用，适用于无法使用 asyncio 的调用方
+
+        各线程共享同一个 requests.Session；HTTPAdapter 的 pool_maxsize 大于线程数，
+        独立请求之间不会争用连接
+
+        :param calls: (API路径, 请求体) 元组列表
+        :return: 与calls顺序一致的结果列表，失败项为None
+        """
+        if not calls:
+            return []
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.MAX_WORKER_THREADS,
+                thread_name_prefix='siyuan'
             )
-            if response.status_code == 401 and include_auth:
+        return list(self._executor.map(lambda call: self.call_api(*call), calls))
+
+    def stream_api(self, api_path: str, payload: dict, prefix: str) -> Iterator[Any]:
+        """
+        流式解析API响应中的数组元素，避免一次性构建完整响应对象
+
+        未安装 ijson 时回退为 call_api 后逐个返回
+
+        :param api_path: API路径
+        :param payload: 请求体数据 (dict)
+        :param prefix: ijson前缀，例如 "data.item"、"data.tree.item"
+        :return: 数组元素迭代器，请求失败时不产生任何元素
+        """
+        if not HAS_IJSON or not isinstance(self.session, requests.Session):
+            data = self.call_api(api_path, payload)
+            for key in prefix.split('.')[1:-1]:
+                data = data.get(key) if isinstance(data, dict) else None
+            yield from data or []
+            return
+
+        try:
+            with self._send_post(api_path, json_dumps(payload), stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                yield from self._iter_stream_items(api_path, ijson.parse(response.raw, use_float=True), prefix)
+        except (requests.exceptions.RequestException, ijson.JSONError) as e:
+            logger.error(f"请求API {api_path} 失败: {e}")
+
+    @staticmethod
+    def _iter_stream_items(api_path: str, events, prefix: str) -> Iterator:
+        """
+        从ijson事件流中取出 prefix 处的元素；思源响应按 code、msg、data 顺序输出，
+        读到 data 之前先检查 code，出错时记录 msg 且不产生任何元素
+
+        :param api_path: API路径，用于日志
+        :param events: ijson.parse 产生的 (path, event, value) 事件迭代器
+        :param prefix: ijson前缀，例如 "data.item"
+        :return: 元素迭代器
+        """
+        code, msg = None, ""
+        for path, event, value in events:
+            if path == "code" and event == "number":
+                code = value
+            elif path == "msg" and event == "string":
+                msg = value
+            elif path == "data":
+                if code != 0:
+                    logger.error(f"调用API {api_path} 出错: {msg}")
+                    return
+                # 把 data 的首个事件放回事件流，prefix 为 "data" 时也能取到
+                events = chain([(path, event, value)], events)
+                break
+        else:
+            if code != 0:
+                logger.error(f"调用API {api_path} 出错: {msg}")
+            return
+
+        for path, event, value in events:
+            if path != prefix:
+                continue
+            if event not in ("start_map", "start_array"):
+                yield value
+                continue
+            # 与 ijson.items 相同：用 ObjectBuilder 逐事件构建该元素，直到对应的结束事件
+            builder = ijson.ObjectBuilder()
+            end_event = event.replace("start", "end")
+            while (path, event) != (prefix, end_event):
+                builder.event(event, value)
+                path, event, value = next(events)
+            yield builder.value
+
+    def stream_sql(self, stmt: str) -> Iterator[dict]:
+        """
+        流式执行SQL查询，逐行返回结果
+
+        :param stmt: SQL语句
+        :return: 结果行迭代器
+        """
+        return self.stream_api("/api/query/sql", {"stmt": stmt}, "data.item")
+
+    async def acall_api(self, api_path: str, payload: dict = None,
+                        session: aiohttp.ClientSession = None) -> Optional[dict]:
+        """
+        异步调用思源笔记API
+
+        :param api_path: API路径
+        :param payload: 请求体数据 (dict)
+        :param session: 复用的aiohttp会话，为None时临时创建
+        :return: 成功则返回API响应的data部分，否则返回None
+        """
+        if session is None:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as temp_session:
+                return await self.acall_api(api_path, payload, temp_session)
+
+        url = f"{self.api_url}{api_path}"
+        include_auth = self._auth_mode == "token"
+        body = json_dumps(payload or {})
+        try:
+            async with session.post(url, headers=self._build_headers(include_auth), data=body) as response:
+                status = response.status
+                json_response = json_loads(await response.read()) if status < 400 else None
+
+            if status == 401 and include_auth:
                 logger.warning("接口 %s 拒绝 Authorization 头，回退为无认证模式重试", api_path)
-                response = requests.post(
-                    f"{self.api_url}{api_path}",
-                    headers=self._build_headers(False),
-                    json=payload,
-                    timeout=30
-                )
-                if response.status_code < 400:
+                async with session.post(url, headers=self._build_headers(False), data=body) as response:
+                    status = response.status
+                    json_response = json_loads(await response.read()) if status < 400 else None
+                if status < 400:
                     self._auth_mode = "none"
                     self.headers = self._build_headers(False)
 
-            response.raise_for_status()
-            json_response = response.json()
+            if status >= 400:
+                logger.error(f"请求API {api_path} 失败: HTTP {status}")
+                return None
 
             if json_response.get("code") != 0:
                 logger.error(f"调用API {api_path} 出错: {json_response.get('msg')}")
@@ -70,7 +362,38 @@ class SiyuanAPI:
 
             return json_response.get("data")
 
-        except requests.exceptions.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
             logger.error(f"请求API {api_path} 失败: {e}")
             return None
+        finally:
+            if not _is_read_api(api_path):
+                self.invalidate_cache()
+
+    async def acall_many(self, calls: List[Tuple[str, Optional[dict]]]) -> List[Optional[dict]]:
+        """
+        并发调用多个API，复用同一个aiohttp会话
+
+        :param calls: (API路径, 请求体) 元组列表
+        :return: 与calls顺序一致的结果列表，失败项为None
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CALLS)
+        connector = aiohttp.TCPConnector(limit=self.MAX_CONCURRENT_CALLS)
+        timeout = aiohttp.ClientTimeout(total=30)
 
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async def bounded_call(api_path: str, payload: Optional[dict]) -> Optional[dict]:
+                async with semaphore:
+                    return await self.acall_api(api_path, payload, session)
+
+            return await asyncio.gather(*(bounded_call(path, payload) for path, payload in calls))
+
+    def call_api_many(self, calls: List[Tuple[str, Optional[dict]]]) -> List[Optional[dict]]:
+        """
+        并发调用多个API的同步封装（不能在已运行的事件循环中调用）
+
+        :param calls: (API路径, 请求体) 元组列表
+        :return: 与calls顺序一致的结果列表，失败项为None
+        """
+        if not calls:
+            return []
+        return asyncio.run(self.acall_many(calls))
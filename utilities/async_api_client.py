@@ -0,0 +1,49 @@
+"""
+思源笔记异步API客户端
+"""
+from typing import Optional
+import aiohttp
+from .api_client import SiyuanAPI
+
+
+class AsyncSiyuanAPI:
+    """基于aiohttp的思源笔记异步API操作类，需在 async with 中使用"""
+
+    def __init__(self, api_client: SiyuanAPI = None, max_connections: int = 32):
+        """
+        初始化异步API客户端
+
+        :param api_client: 同步API客户端，复用其地址、Token与认证回退状态
+        :param max_connections: 连接池最大连接数
+        """
+        self.api_client = api_client or SiyuanAPI()
+        self.max_connections = max_connections
+        self._session = None
+
+    async def __aenter__(self) -> 'AsyncSiyuanAPI':
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """关闭aiohttp会话"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def call_api(self, api_path: str, payload: dict = None) -> Optional[dict]:
+        """
+        异步调用思源笔记API，所有请求共享同一个连接池
+
+        :param api_path: API路径，例如 "/api/filetree/createDocWithMd"
+        :param payload: 请求体数据 (dict)
+        :return: 成功则返回API响应的data部分，否则返回None
+        """
+        if self._session is None:
+            raise RuntimeError("AsyncSiyuanAPI 需要在 async with 语句中使用")
+        return await self.api_client.acall_api(api_path, payload, self._session)
@@ -1,13 +1,37 @@
 """
 块管理器
 """
-from typing import List, Optional
-from .common import logger
+from typing import Dict, List, Optional, Tuple
+from .common import logger, sql_id
+
+
+# 子块优先级：段落块 -> 标题/列表/引用块 -> 任意子块，同级按创建时间先后
+_CHILD_PRIORITY_ORDER = "CASE type WHEN 'p' THEN 0 WHEN 'h' THEN 1 WHEN 'l' THEN 1 WHEN 'b' THEN 1 ELSE 2 END, created"
+# SQL模板，{id} 为经过 sql_id 校验的块ID，{ids} 为校验后以逗号分隔的带引号ID列表
+_SQL_FIRST_PARAGRAPH = (
+    "SELECT id, type FROM blocks WHERE parent_id = '{id}' "
+    f"ORDER BY {_CHILD_PRIORITY_ORDER} LIMIT 1"
+)
+_SQL_FIRST_PARAGRAPHS = (
+    "SELECT id, parent_id FROM blocks WHERE parent_id IN ({ids}) "
+    f"ORDER BY parent_id, {_CHILD_PRIORITY_ORDER} LIMIT {{limit}}"
+)
+# 文档标题与块属性一起查询：标题来自 blocks.content，其余属性来自 attributes 表
+_SQL_BLOCKS_ATTRIBUTES = (
+    "SELECT id AS block_id, 'title' AS name, content AS value FROM blocks WHERE id IN ({ids}) AND type = 'd' "
+    "UNION ALL SELECT block_id, name, value FROM attributes WHERE block_id IN ({ids}) "
+    "LIMIT {limit}"
+)
+_SQL_BLOCK_MARKDOWN = "SELECT markdown FROM blocks WHERE id = '{id}'"
 
 
 class BlockManager:
     """块管理类"""
 
+    # 批量查询时每条SQL包含的文档数量与返回行数上限
+    BATCH_QUERY_SIZE = 200
+    BATCH_QUERY_ROW_LIMIT = 20000
+
     def __init__(self, api_client):
         self.api = api_client
 
@@ -18,10 +42,48 @@ class BlockManager:
         :param block_id: 块ID
         :return: 属性字典
         """
+        # 与 get_block_markdown 共用API客户端的LRU缓存，同一客户端调用任何写接口后缓存即被清空
         payload = {"id": block_id}
-        return self.api.call_api("/api/attr/getBlockAttrs", payload)
+        return self.api.call_api("/api/attr/getBlockAttrs", payload, cache=True)
+
+    def get_blocks_attributes(self, block_ids: List[str]) -> Dict[str, Optional[dict]]:
+        """
+        批量获取多个文档块的属性（标题与 attributes 表中的属性），每批文档只发送一条SQL
+
+        :param block_ids: 文档块ID列表
+        :return: 块ID到属性字典的映射，查询不到的块为None
+        """
+        result = {}
+
+        for start in range(0, len(block_ids), self.BATCH_QUERY_SIZE):
+            batch = block_ids[start:start + self.BATCH_QUERY_SIZE]
+            id_list = ", ".join(f"'{sql_id(block_id)}'" for block_id in batch)
+            sql = _SQL_BLOCKS_ATTRIBUTES.format(ids=id_list, limit=self.BATCH_QUERY_ROW_LIMIT)
+            rows = self.api.call_api("/api/query/sql", {"stmt": sql})
+
+            # 查询失败或结果被截断时，回退为逐个并发调用 getBlockAttrs
+            if rows is None or len(rows) >= self.BATCH_QUERY_ROW_LIMIT:
+                results = self.api.map_api([("/api/attr/getBlockAttrs", {"id": block_id}) for block_id in batch])
+                result.update(zip(batch, results))
+                continue
 
+            batch_attrs = {}
+            for row in rows:
+                batch_attrs.setdefault(row["block_id"], {})[row["name"]] = row["value"]
+            for block_id in batch:
+                result[block_id] = batch_attrs.get(block_id)
 
+        return result
+
+    def get_blocks_kramdown(self, block_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        用线程池并发获取多个块的kramdown源码
+
+        :param block_ids: 块ID列表
+        :return: 块ID到kramdown的映射，获取失败的块为None
+        """
+        results = self.api.map_api([("/api/block/getBlockKramdown", {"id": block_id}) for block_id in block_ids])
+        return {block_id: (data or {}).get("kramdown") for block_id, data in zip(block_ids, results)}
 
     def get_child_blocks(self, block_id: str) -> List[dict]:
         """
@@ -41,30 +103,53 @@ class BlockManager:
         :param doc_id: 文档块ID
         :return: 第一个段落块的ID，如果找不到则返回None
         """
-        # 首先尝试查找段落块
-        payload = {"stmt": f"SELECT id FROM blocks WHERE parent_id = '{doc_id}' AND type = 'p' LIMIT 1"}
-        data = self.api.call_api("/api/query/sql", payload)
-        if data and len(data) > 0:
-            return data[0]["id"]
+        data = self.api.call_api("/api/query/sql", {"stmt": _SQL_FIRST_PARAGRAPH.format(id=sql_id(doc_id))})
 
-        # 如果没有段落块，尝试查找其他类型的块
-        payload = {"stmt": f"SELECT id FROM blocks WHERE parent_id = '{doc_id}' AND type IN ('h', 'list', 'blockquote') LIMIT 1"}
-        data = self.api.call_api("/api/query/sql", payload)
-        if data and len(data) > 0:
-            logger.info(f"文档 {doc_id} 没有段落块，使用其他类型的块: {data[0]['id']}")
-            return data[0]["id"]
-
-        # 如果还是没有，尝试查找任何子块
-        payload = {"stmt": f"SELECT id FROM blocks WHERE parent_id = '{doc_id}' LIMIT 1"}
-        data = self.api.call_api("/api/query/sql", payload)
-        if data and len(data) > 0:
-            logger.info(f"文档 {doc_id} 没有常规块，使用第一个子块: {data[0]['id']}")
-            return data[0]["id"]
+        if data:
+            block = data[0]
+            if block.get("type") in ("h", "l", "b"):
+                logger.info(f"文档 {doc_id} 没有段落块，使用其他类型的块: {block['id']}")
+            elif block.get("type") != "p":
+                logger.info(f"文档 {doc_id} 没有常规块，使用第一个子块: {block['id']}")
+            return block["id"]
 
         # 最后，如果文档是空的，可以直接在文档块本身添加内容
         logger.info(f"文档 {doc_id} 似乎是空的，将直接在文档块添加内容")
         return doc_id
 
+    def get_first_paragraph_ids(self, doc_ids: List[str]) -> Dict[str, str]:
+        """
+        批量获取多个文档的第一个段落块ID，每批文档只发送一条SQL
+
+        优先级与 get_first_paragraph_id 相同：段落块 -> 标题/列表/引用块 -> 任意子块 -> 文档块本身
+
+        :param doc_ids: 文档块ID列表
+        :return: 文档ID到目标块ID的映射
+        """
+        result = {}
+
+        for start in range(0, len(doc_ids), self.BATCH_QUERY_SIZE):
+            batch = doc_ids[start:start + self.BATCH_QUERY_SIZE]
+            id_list = ", ".join(f"'{sql_id(doc_id)}'" for doc_id in batch)
+            sql = _SQL_FIRST_PARAGRAPHS.format(ids=id_list, limit=self.BATCH_QUERY_ROW_LIMIT)
+            rows = self.api.call_api("/api/query/sql", {"stmt": sql}) or []
+
+            for row in rows:
+                result.setdefault(row["parent_id"], row["id"])
+
+            # 结果被截断时，未出现的文档不能断定为空文档，逐个回退查询
+            truncated = len(rows) >= self.BATCH_QUERY_ROW_LIMIT
+            for doc_id in batch:
+                if doc_id in result:
+                    continue
+                if truncated:
+                    result[doc_id] = self.get_first_paragraph_id(doc_id)
+                else:
+                    logger.info(f"文档 {doc_id} 似乎是空的，将直接在文档块添加内容")
+                    result[doc_id] = doc_id
+
+        return result
+
     def get_block_markdown(self, block_id: str) -> Optional[str]:
         """
         使用SQL查询获取块的markdown内容
@@ -72,8 +157,8 @@ class BlockManager:
         :param block_id: 块ID
         :return: 块的markdown内容，如果找不到则返回None
         """
-        payload = {"stmt": f"SELECT markdown FROM blocks WHERE id = '{block_id}'"}
-        data = self.api.call_api("/api/query/sql", payload)
+        payload = {"stmt": _SQL_BLOCK_MARKDOWN.format(id=sql_id(block_id))}
+        data = self.api.call_api("/api/query/sql", payload, cache=True)
         if data and len(data) > 0:
             return data[0]["markdown"]
         return None
@@ -97,4 +182,36 @@ class BlockManager:
         }
 
         result = self.api.call_api("/api/block/insertBlock", payload)
-        return result is not None
\ No newline at end of file
+        if result is None:
+            return False
+
+        self.api.invalidate_cache()
+        return True
+
+    def prepend_metadata_to_blocks(self, pairs: List[Tuple[str, str]]) -> List[bool]:
+        """
+        批量将元数据添加到多个块的开头，并发发送 insertBlock 请求
+
+        :param pairs: (目标块ID, 元数据字符串) 元组列表
+        :return: 与pairs顺序一致的成功标记列表
+        """
+        if not pairs:
+            return []
+
+        logger.info(f"正在批量向 {len(pairs)} 个块添加元数据...")
+
+        calls = [
+            ("/api/block/insertBlock", {
+                "dataType": "markdown",
+                "data": metadata,
+                "nextID": block_id,
+                "parentID": "",
+                "previousID": ""
+            })
+            for block_id, metadata in pairs
+        ]
+        results = [result is not None for result in self.api.call_api_many(calls)]
+
+        if any(results):
+            self.api.invalidate_cache()
+        return results
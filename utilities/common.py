@@ -1,16 +1,98 @@
 """
 公共配置和工具函数
 """
+import json
 import logging
 import os
+import re
+from typing import Any, Union
 from dotenv import load_dotenv
 
-# 加载环境变量
-load_dotenv()
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+_env_loaded = False
+
+
+def load_env() -> None:
+    """首次调用时加载 .env 文件中的环境变量（延迟到真正需要配置时）"""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+
+def get_env(name: str, default: str = None) -> str:
+    """读取环境变量，必要时先加载 .env 文件"""
+    load_env()
+    return os.getenv(name, default)
+
+
+# 默认配置（DEFAULT_API_URL / DEFAULT_API_TOKEN）在首次访问时才读取环境变量
+_LAZY_DEFAULTS = {
+    "DEFAULT_API_URL": ("SIYUAN_API_URL", "http://127.0.0.1:6806"),
+    "DEFAULT_API_TOKEN": ("SIYUAN_API_TOKEN", None),
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_DEFAULTS:
+        env_name, default = _LAZY_DEFAULTS[name]
+        return get_env(env_name, default)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# 思源块/笔记本ID格式，例如 20210808180117-czj9bvb
+SIYUAN_ID_PATTERN = re.compile(r'^\d{14}-[a-z0-9]{7}$')
+
+
+def sql_id(value: str) -> str:
+    """
+    校验思源ID后返回，用于拼接SQL语句
+
+    :param value: 块ID或笔记本ID
+    :return: 原样返回的ID
+    :raises ValueError: ID格式不合法
+    """
+    if not isinstance(value, str) or not SIYUAN_ID_PATTERN.match(value):
+        raise ValueError(f"无效的思源ID: {value!r}")
+    return value
+
+
+def sql_str(value: str) -> str:
+    """
+    转义SQL字符串字面量中的单引号，用于拼接路径等任意文本
+
+    :param value: 原始字符串
+    :return: 转义后的字符串
+    """
+    return value.replace("'", "''")
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """解析JSON，优先使用 orjson"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(data: Any, indent: bool = False) -> bytes:
+    """
+    序列化为UTF-8编码的JSON字节串，优先使用 orjson
+
+    :param data: 要序列化的数据
+    :param indent: 是否以2空格缩进输出
+    :return: JSON字节串（非ASCII字符不转义）
+    """
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
 
-# 默认配置
-DEFAULT_API_URL = os.getenv("SIYUAN_API_URL", "http://127.0.0.1:6806")
-DEFAULT_API_TOKEN = os.getenv("SIYUAN_API_TOKEN")
 
 def setup_logging(level=logging.INFO):
     """配置日志系统"""
@@ -20,5 +102,6 @@ def setup_logging(level=logging.INFO):
     )
     return logging.getLogger(__name__)
 
-# 创建默认日志记录器
-logger = setup_logging()
\ No newline at end of file
+
+# 默认日志记录器；日志处理器由入口脚本通过 setup_logging() 配置
+logger = logging.getLogger(__name__)
@@ -1,8 +1,19 @@
 """
 文档管理器
 """
-from typing import List, Optional
-from .common import logger
+from typing import Dict, List, Optional
+from .common import logger, sql_id, sql_str
+
+
+# SQL模板（/api/query/sql 只接受完整语句，不支持参数绑定），
+# {box} 为经过 sql_id 校验的笔记本ID，{path_filter} 为已转义的 hpath 条件
+_SQL_DOCS_IN_PATH = (
+    "SELECT id FROM blocks WHERE box = '{box}' AND type = 'd' {path_filter} "
+    "ORDER BY created LIMIT 5000"
+)
+_SQL_HPATH_FILTER = "AND (hpath = '{path}' OR hpath LIKE '{path}/%')"
+_SQL_DOCS_BY_HPATHS = "SELECT id, hpath FROM blocks WHERE box = '{box}' AND type = 'd' AND hpath IN ({hpaths})"
+_SQL_DOCS_IN_NOTEBOOK = "SELECT id FROM blocks WHERE box = '{box}' AND type = 'd' ORDER BY created"
 
 
 class DocumentManager:
@@ -29,6 +40,31 @@ class DocumentManager:
 
         if data:
             # logger.info(f"成功创建文档: {path} -> {data}")
+            self.api.invalidate_cache()
+            return data
+
+        logger.error(f"创建文档失败: {path}")
+        return None
+
+    async def create_doc_with_md_async(self, async_api, notebook_id: str, path: str, markdown: str) -> Optional[str]:
+        """
+        通过Markdown异步创建文档
+
+        :param async_api: AsyncSiyuanAPI 实例
+        :param notebook_id: 笔记本ID
+        :param path: 文档路径
+        :param markdown: Markdown内容
+        :return: 创建的文档ID，失败返回None
+        """
+        logger.info(f"正在创建文档: {path}")
+        data = await async_api.call_api("/api/filetree/createDocWithMd", {
+            "notebook": notebook_id,
+            "path": path,
+            "markdown": markdown
+        })
+
+        if data:
+            self.api.invalidate_cache()
             return data
 
         logger.error(f"创建文档失败: {path}")
@@ -44,23 +80,14 @@ class DocumentManager:
         """
         logger.info(f"正在从笔记本 '{notebook_id}' 的路径 '{doc_path}' 获取文档...")
 
-        # 标准化路径格式
-        normalized_path = doc_path.strip('/')
-        if normalized_path:
-            normalized_path = '/' + normalized_path
-        else:
-            normalized_path = '/'
-
-        # 使用SQL查询获取指定路径下的文档IDs
-        sql_query = f"""
-        SELECT id
-        FROM blocks
-        WHERE box = '{notebook_id}' AND type = 'd'
-        AND (hpath = '{normalized_path}' OR hpath LIKE '{normalized_path}/%')
-        ORDER BY created LIMIT 5000
-        """
+        # 标准化路径格式；根路径下就是整个笔记本，无需 hpath 过滤
+        stripped_path = doc_path.strip('/')
+        path_filter = _SQL_HPATH_FILTER.format(path=sql_str('/' + stripped_path)) if stripped_path else ""
+
+        # 使用SQL查询获取指定路径下的文档IDs（相同笔记本+路径的重复查询由API客户端缓存）
+        sql_query = _SQL_DOCS_IN_PATH.format(box=sql_id(notebook_id), path_filter=path_filter)
 
-        data = self.api.call_api("/api/query/sql", {"stmt": sql_query})
+        data = self.api.call_api("/api/query/sql", {"stmt": sql_query}, cache=True)
 
         if data and len(data) > 0:
             doc_ids = [row["id"] for row in data]
@@ -79,14 +106,14 @@ class DocumentManager:
         """
         logger.info(f'正在通过SQL查询获取笔记本 {notebook_id} 下的文档...')
 
-        sql = f"SELECT id, content FROM blocks WHERE box = '{notebook_id}' AND type = 'd' ORDER BY created"
+        sql = _SQL_DOCS_IN_NOTEBOOK.format(box=sql_id(notebook_id))
         logger.info(f'执行SQL: {sql}')
 
-        data = self.api.call_api('/api/query/sql', {'stmt': sql})
+        # 流式解析结果，大笔记本不必先构建完整的响应对象
+        doc_ids = [doc['id'] for doc in self.api.stream_sql(sql)]
 
-        if data:
-            doc_ids = [doc['id'] for doc in data]
-            logger.info(f'通过SQL查询找到 {len(data)} 个文档')
+        if doc_ids:
+            logger.info(f'通过SQL查询找到 {len(doc_ids)} 个文档')
             return doc_ids
 
         logger.warning('SQL查询未找到文档')
@@ -113,6 +140,26 @@ class DocumentManager:
 
         return []
 
+    def get_ids_by_hpaths(self, hpaths: List[str], notebook_id: str) -> Dict[str, str]:
+        """
+        用一条SQL批量查询多个人类可读路径对应的文档ID
+
+        :param hpaths: 人类可读路径列表，例如 ["/a", "/a/b"]
+        :param notebook_id: 笔记本ID
+        :return: 已存在路径到文档ID的映射（同一路径有多个文档时取第一个）
+        """
+        if not hpaths:
+            return {}
+
+        sql = _SQL_DOCS_BY_HPATHS.format(
+            box=sql_id(notebook_id),
+            hpaths=", ".join(f"'{sql_str(hpath)}'" for hpath in hpaths)
+        )
+        result = {}
+        for row in self.api.call_api("/api/query/sql", {"stmt": sql}) or []:
+            result.setdefault(row["hpath"], row["id"])
+        return result
+
     def get_doc_tree(self, notebook_id: str, path: str = "/") -> List[dict]:
         """
         通过API获取指定笔记本的文档树结构
@@ -123,14 +170,12 @@ class DocumentManager:
         """
         logger.info(f'正在获取笔记本 {notebook_id} 的文档树结构...')
 
-        data = self.api.call_api('/api/filetree/listDocTree', {
+        tree_data = list(self.api.stream_api('/api/filetree/listDocTree', {
             'notebook': notebook_id,
             'path': path
-        })
+        }, 'data.tree.item'))
 
-        if data:
-            tree_data = data.get('tree', [])
+        if tree_data:
             logger.info(f'获取到文档树，包含 {len(tree_data)} 个根节点')
-            return tree_data
 
-        return []
\ No newline at end of file
+        return tree_data
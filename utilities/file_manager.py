@@ -1,15 +1,17 @@
 """
 文件管理器
 """
-import json
 from pathlib import Path
 from typing import Dict, Any
-from .common import logger
+from .common import logger, json_loads, json_dumps
 
 
 class FileManager:
     """文件管理类"""
 
+    # 已确认存在的输出目录，避免重复调用 mkdir
+    _ensured_dirs = set()
+
     @staticmethod
     def load_json_file(file_path: str) -> Dict[str, Any]:
         """
@@ -19,17 +21,16 @@ class FileManager:
         :return: JSON数据
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return json_loads(Path(file_path).read_bytes())
         except FileNotFoundError:
             logger.error(f"错误：找不到文件 {file_path}")
             return {}
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             logger.error(f"错误：解析JSON文件 {file_path} 时出错: {e}")
             return {}
 
-    @staticmethod
-    def save_json_file(data: Dict[str, Any], file_path: str) -> bool:
+    @classmethod
+    def save_json_file(cls, data: Dict[str, Any], file_path: str) -> bool:
         """
         保存数据到JSON文件
 
@@ -39,10 +40,21 @@ class FileManager:
         """
         try:
             output_file = Path(file_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
+            parent = output_file.parent
+            parent_key = str(parent)
+            if parent_key not in cls._ensured_dirs:
+                parent.mkdir(parents=True, exist_ok=True)
+                cls._ensured_dirs.add(parent_key)
 
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            content = json_dumps(data, indent=True)
+            try:
+                output_file.write_bytes(content)
+            except FileNotFoundError:
+                # 目录在首次保存后被删除：移出已确认集合，重新创建后重试一次
+                cls._ensured_dirs.discard(parent_key)
+                parent.mkdir(parents=True, exist_ok=True)
+                cls._ensured_dirs.add(parent_key)
+                output_file.write_bytes(content)
 
             logger.info(f"数据已保存到: {file_path}")
             return True
@@ -6,9 +6,8 @@ HTML转Markdown转换器模块
 import logging
 import re
 import html
-from typing import Optional, Dict, List
-from urllib.parse import urljoin, urlparse
-from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urljoin
 
 try:
     from bs4 import BeautifulSoup, Comment
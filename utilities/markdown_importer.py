@@ -1,17 +1,44 @@
 """
 Markdown文件导入器
 """
+import asyncio
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import unquote
-from typing import Optional
+from typing import Optional, Tuple
 from .common import logger
+from .media_manager import MEDIA_EXTENSION_TYPES
+
+
+# 图片与音视频链接：![alt](path)，路径不含右括号和换行以免贪婪匹配跨越多个链接
+# 第3组为扩展名，直接查表得到媒体类型
+_MEDIA_LINK_RE = re.compile(
+    r'!\[([^\]]*)\]\(([^)\n]+(\.(?:%s)))\)' % '|'.join(sorted(ext[1:] for ext in MEDIA_EXTENSION_TYPES)),
+    re.IGNORECASE
+)
+
+# 代码块：从 ``` 行到下一个 ``` 行（未闭合时到文末）
+_FENCE_RE = re.compile(r"(^[^\S\n]*```.*?(?:^[^\S\n]*```[^\n]*$|\Z))", re.M | re.S)
+# 不参与软回车转换的行：空行、标题、列表、引用、代码块标记、表格、分割线
+_SPECIAL_LINE = (
+    r"[^\S\n]*(?:$|#|[-*+] |\d[^\n]{0,7}\. |>|```|[^\n]*\||[-*_]+[^\S\n]*$)"
+)
+# 两个相邻的非空行；不存在时文档已全部用空行分段，无需转换
+_ADJACENT_LINES_RE = re.compile(r"[^\n]\n[^\n]")
+# 两个相邻的普通文本行之间的单个换行
+_SOFT_BREAK_RE = re.compile(rf"^(?!{_SPECIAL_LINE})([^\n]+)\n(?=(?!{_SPECIAL_LINE})[^\n])", re.M)
 
 
 class MarkdownImporter:
     """Markdown文件导入器"""
 
+    # 并发上传媒体文件的线程数；批量导入时所有文档共用一个上传线程池，总并发不超过此值
+    MAX_UPLOAD_WORKERS = 8
+    # 异步导入时同时进行的文档数
+    MAX_CONCURRENT_IMPORTS = 8
+
     def __init__(self, api_client):
         self.api = api_client
         # 延迟导入避免循环依赖
@@ -33,254 +60,139 @@ class MarkdownImporter:
         :param content: 原始Markdown内容
         :return: 转换后的Markdown内容
         """
-        # logger.info("开始转换软回车为硬回车")
+        if not _ADJACENT_LINES_RE.search(content):
+            return content
 
-        # 按行分割内容
-        lines = content.split('\n')
-        processed_lines = []
+        # 代码块原样保留，只在代码块之间的文本中转换
+        parts = _FENCE_RE.split(content)
+        for i in range(0, len(parts), 2):
+            parts[i] = _SOFT_BREAK_RE.sub(r"\1\n\n", parts[i])
+        return ''.join(parts)
 
-        i = 0
-        in_code_block = False
-
-        while i < len(lines):
-            current_line = lines[i]
-
-            # 检查是否进入或退出代码块
-            stripped_line = current_line.strip()
-            if stripped_line.startswith('```'):
-                in_code_block = not in_code_block
-                processed_lines.append(current_line)
-                i += 1
-                continue
+    def process_markdown_media(self, content: str, md_file_path: Path,
+                               executor: ThreadPoolExecutor = None) -> Tuple[str, int]:
+        """
+        处理Markdown文件中的媒体文件引用，上传到思源笔记并更新链接
 
-            # 如果在代码块内，直接添加行，不做任何转换
-            if in_code_block:
-                processed_lines.append(current_line)
-                i += 1
-                continue
+        先收集所有本地媒体文件，去重后用线程池并发上传，再统一替换链接
 
-            # 跳过空行（已经是硬回车）
-            if not current_line.strip():
-                processed_lines.append(current_line)
-                i += 1
-                continue
+        :param content: Markdown内容
+        :param md_file_path: MD文件的路径（用于解析相对路径）
+        :param executor: 共用的上传线程池，为None时临时创建
+        :return: (处理后的Markdown内容, 更新的媒体链接数)
+        """
+        md_dir = md_file_path.parent
 
-            # 跳过特殊Markdown语法行，这些不需要转换
-            # 标题行（# ## ### 等）
-            if stripped_line.startswith('#'):
-                processed_lines.append(current_line)
-                i += 1
-                continue
+        # 第一遍：收集需要上传的媒体文件，{链接起始位置: 本地路径}、{本地路径: 媒体类型}
+        link_paths = {}
+        media_types = {}
+        for match in _MEDIA_LINK_RE.finditer(content):
+            media_path = match.group(2)
 
-            # 列表项（- * + 或数字列表）
-            if (stripped_line.startswith(('- ', '* ', '+ ')) or
-                (stripped_line and stripped_line[0].isdigit() and '. ' in stripped_line[:10])):
-                processed_lines.append(current_line)
-                i += 1
+            # 跳过明显是表格内容的匹配（通过检查前后文）
+            if '|' in content[max(0, match.start() - 10):match.start()] or '|' in content[match.end():match.end() + 10]:
+                logger.debug("跳过表格中的引用: %s", media_path)
                 continue
 
-            # 引用行（>）
-            if stripped_line.startswith('>'):
-                processed_lines.append(current_line)
-                i += 1
-                continue
+            # 解码URL编码的路径
+            try:
+                media_path = unquote(media_path)
+            except Exception as e:
+                logger.warning(f"URL解码失败: {media_path}, 错误: {e}")
 
-            # 表格行（包含 |）
-            if '|' in stripped_line:
-                processed_lines.append(current_line)
-                i += 1
+            # 跳过网络链接
+            if media_path.startswith(('http://', 'https://', 'ftp://')):
+                logger.debug("跳过网络链接: %s", media_path)
                 continue
 
-            # 水平分割线（--- 或 ***）
-            if stripped_line in ('---', '***', '___') or all(c in '-*_' for c in stripped_line):
-                processed_lines.append(current_line)
-                i += 1
+            # 处理相对路径并标准化
+            full_media_path = Path(media_path) if os.path.isabs(media_path) else md_dir / media_path
+            try:
+                full_media_path = full_media_path.resolve()
+            except Exception as e:
+                logger.warning(f"路径解析失败: {media_path}, 错误: {e}")
                 continue
 
-            # 普通文本行，检查是否需要转换软回车
-            # 如果当前行不是空行，且下一行也不是空行，且下一行不是特殊语法行
-            # 则在当前行后添加空行（转换为硬回车）
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-
-                # 如果下一行是空行，说明已经是硬回车，不需要处理
-                if not next_line:
-                    processed_lines.append(current_line)
-                    i += 1
-                    continue
-
-                # 检查下一行是否是特殊语法行
-                next_is_special = (
-                    next_line.startswith('#') or  # 标题
-                    next_line.startswith(('- ', '* ', '+ ')) or  # 列表
-                    (next_line and next_line[0].isdigit() and '. ' in next_line[:10]) or  # 数字列表
-                    next_line.startswith('```') or  # 代码块
-                    next_line.startswith('>') or  # 引用
-                    '|' in next_line or  # 表格
-                    next_line in ('---', '***', '___') or  # 分割线
-                    all(c in '-*_' for c in next_line if next_line)  # 分割线
-                )
-
-                # 如果下一行是特殊语法行，不添加空行
-                if next_is_special:
-                    processed_lines.append(current_line)
-                else:
-                    # 普通文本行之间添加空行（转换为硬回车）
-                    processed_lines.append(current_line)
-                    processed_lines.append('')  # 添加空行
+            # 逐链接日志使用惰性格式化，未开启DEBUG时不拼接字符串
+            logger.debug("处理链接: %s -> %s", match.group(0), full_media_path)
+            link_paths[match.start()] = full_media_path
+            media_types[full_media_path] = MEDIA_EXTENSION_TYPES[match.group(3).lower()]
 
+        # 检查文件是否存在（正则已限定媒体扩展名，无需再判断文件类型）
+        upload_paths = []
+        for full_media_path in media_types:
+            if full_media_path.exists():
+                upload_paths.append(full_media_path)
             else:
-                # 最后一行，直接添加
-                processed_lines.append(current_line)
+                logger.warning(f"⚠️ 媒体文件不存在: {full_media_path}\n")
 
-            i += 1
+        if not upload_paths:
+            return content, 0
 
-        result = '\n'.join(processed_lines)
+        # 上传是相互独立的阻塞HTTP请求，并发执行；同一文件只上传一次
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=min(self.MAX_UPLOAD_WORKERS, len(upload_paths))) as temp_executor:
+                return self.process_markdown_media(content, md_file_path, temp_executor)
 
-        # 统计转换的数量
-        original_line_count = len(content.split('\n'))
-        new_line_count = len(result.split('\n'))
-        added_lines = new_line_count - original_line_count
+        uploaded = dict(zip(
+            upload_paths,
+            executor.map(lambda path: self.media_manager.upload_asset(str(path)), upload_paths)
+        ))
 
-        # if added_lines > 0:
-        #     logger.info(f"✅ 软回车转换完成，添加了 {added_lines} 个硬回车")
-        # else:
-        #     logger.info("📝 未发现需要转换的软回车")
+        for full_media_path, uploaded_path in uploaded.items():
+            if not uploaded_path:
+                logger.warning(f"❌ 媒体文件上传失败: {full_media_path}\n")
 
-        return result
+        # 第二遍：一次 sub 替换所有已上传的链接，避免对整个文档反复 replace
+        upload_count = 0
 
-    def process_markdown_media(self, content: str, md_file_path: Path) -> str:
+        def replace_link(match: re.Match) -> str:
+            nonlocal upload_count
+            full_media_path = link_paths.get(match.start())
+            uploaded_path = uploaded.get(full_media_path)
+            if not uploaded_path:
+                return match.group(0)
+
+            upload_count += 1
+            alt_text = match.group(1) or ""
+            if media_types[full_media_path] == 'image':
+                # 保持原有的格式，只替换路径部分
+                return f'![{alt_text}]({uploaded_path})'
+            # 音频和视频文件
+            return f'[{alt_text or full_media_path.name}]({uploaded_path})'
+
+        processed_content = _MEDIA_LINK_RE.sub(replace_link, content)
+        return processed_content, upload_count
+
+    def _prepare_md_file(self, md_file: Path, upload_media: bool, convert_soft_breaks: bool,
+                         upload_executor: ThreadPoolExecutor = None) -> Tuple[str, int]:
         """
-        处理Markdown文件中的媒体文件引用，上传到思源笔记并更新链接
+        读取并预处理单个MD文件
 
-        :param content: Markdown内容
-        :param md_file_path: MD文件的路径（用于解析相对路径）
-        :return: 处理后的Markdown内容
+        :param md_file: MD文件路径
+        :param upload_media: 是否上传媒体文件
+        :param convert_soft_breaks: 是否将软回车转换为硬回车
+        :param upload_executor: 共用的上传线程池，为None时临时创建
+        :return: (处理后的内容, 上传的媒体文件数)
         """
-        processed_content = content
-        md_dir = md_file_path.parent
-        upload_count = 0
-
-        # logger.info(f"开始处理文件中的媒体链接: {md_file_path.name}")
-
-        # 使用贪婪匹配，正确处理路径中的括号
-        patterns = [
-            # 图片格式：![alt](path)
-            (r'!\[([^\]]*)\]\(([^)\n]+\.(?:png|jpg|jpeg|gif|svg|webp|bmp|ico))\)', 'image'),
-            # 媒体文件链接格式
-            (r'!\[([^\]]*)\]\(([^)\n]+\.(?:mp3|mp4|mov|avi|wav|m4a|aac|ogg|flac|mkv|webm|wmv|flv))\)', 'media'),
-        ]
-
-        for pattern, media_type_hint in patterns:
-            matches = list(re.finditer(pattern, processed_content, re.IGNORECASE | re.MULTILINE))
-            # logger.info(f"找到 {len(matches)} 个 {media_type_hint} 链接匹配")
-
-            # 从后往前替换，避免位置偏移
-            for match in reversed(matches):
-                try:
-                    full_match = match.group(0)
-                    alt_text = match.group(1) if len(match.groups()) >= 1 and match.group(1) else ""
-                    media_path = match.group(2) if len(match.groups()) >= 2 and match.group(2) else ""
-
-                    if not media_path:
-                        logger.debug(f"跳过无效匹配: {full_match}")
-                        continue
-
-                    logger.debug(f"处理链接: {full_match}")
-                    logger.debug(f"Alt文本: '{alt_text}'")
-                    logger.debug(f"媒体路径: {media_path}")
-                except IndexError as e:
-                    logger.warning(f"正则表达式匹配组错误: {e}")
-                    continue
-
-                # 跳过明显是表格内容的匹配（通过检查前后文）
-                match_start = max(0, match.start() - 50)
-                match_end = min(len(processed_content), match.end() + 50)
-
-                # 更安全的表格检查方法
-                try:
-                    before_context = processed_content[match_start:match.start()]
-                    after_context = processed_content[match.end():match_end]
-
-                    # 如果周围有表格标记，跳过
-                    if '|' in before_context[-10:] or '|' in after_context[:10]:
-                        logger.debug(f"跳过表格中的引用: {media_path}")
-                        continue
-                except Exception as e:
-                    logger.debug(f"表格检查失败，继续处理: {e}")
-                    # 如果检查失败，继续处理
-
-                # 解码URL编码的路径
-                try:
-                    media_path = unquote(media_path)
-                except Exception as e:
-                    logger.warning(f"URL解码失败: {media_path}, 错误: {e}")
-
-                # 跳过网络链接
-                if media_path.startswith(('http://', 'https://', 'ftp://')):
-                    logger.debug(f"跳过网络链接: {media_path}")
-                    continue
+        content = md_file.read_text(encoding='utf-8')
 
-                # 处理相对路径
-                if not os.path.isabs(media_path):
-                    full_media_path = md_dir / media_path
-                else:
-                    full_media_path = Path(media_path)
+        # 转换软回车为硬回车（如果启用）
+        if convert_soft_breaks:
+            content = self.convert_soft_breaks_to_hard_breaks(content)
 
-                # 标准化路径
-                try:
-                    full_media_path = full_media_path.resolve()
-                    # logger.info(f"解析后的完整路径: {full_media_path}")
-                except Exception as e:
-                    logger.warning(f"路径解析失败: {media_path}, 错误: {e}")
-                    continue
+        # 处理媒体文件（如果启用）
+        media_uploaded = 0
+        if upload_media:
+            content, media_uploaded = self.process_markdown_media(content, md_file, upload_executor)
 
-                # 检查文件是否存在且是媒体文件
-                if full_media_path.exists() and self.media_manager.is_media_file(str(full_media_path)):
-                    # logger.info(f"发现媒体文件: {full_media_path.name}")
-
-                    # 上传媒体文件
-                    uploaded_path = self.media_manager.upload_asset(str(full_media_path))
-
-                    if uploaded_path:
-                        # 替换链接
-                        media_type = self.media_manager.get_media_type(str(full_media_path))
-
-                        if media_type == 'image':
-                            # 保持原有的格式，只替换路径部分
-                            new_link = f'![{alt_text}]({uploaded_path})'
-                        else:
-                            # 音频和视频文件
-                            new_link = f'[{alt_text or full_media_path.name}]({uploaded_path})'
-
-                        # 执行替换 - 使用简单字符串替换而不是正则表达式
-                        try:
-                            processed_content = processed_content.replace(full_match, new_link)
-                            upload_count += 1
-                            # logger.info(f"✅ 已更新媒体链接: {media_path} -> {uploaded_path}")
-                        except Exception as replace_error:
-                            logger.error(f"字符串替换失败: {replace_error}")
-                            logger.debug(f"原始匹配: {repr(full_match)}")
-                            logger.debug(f"新链接: {repr(new_link)}")
-                            continue
-                    else:
-                        logger.warning(f"❌ 媒体文件上传失败: {full_media_path}\n")
-                else:
-                    if not full_media_path.exists():
-                        logger.warning(f"⚠️ 媒体文件不存在: {full_media_path}\n")
-                    elif not self.media_manager.is_media_file(str(full_media_path)):
-                        logger.debug(f"跳过非媒体文件: {full_media_path}\n")
-
-        # if upload_count > 0:
-        #     logger.info(f"🎉 成功上传并更新了 {upload_count} 个媒体文件的链接")
-        # else:
-        #     logger.info("未找到需要上传的媒体文件")
-
-        return processed_content
+        return content, media_uploaded
 
     def import_md_files(self, md_folder: str, notebook_name: str, parent_folder: str = None, upload_media: bool = True, convert_soft_breaks: bool = True) -> dict:
         """
-        批量导入MD文件到思源笔记
+        批量导入MD文件到思源笔记（import_md_files_async 的同步封装）
+
+        在已运行的事件循环中（如 Jupyter）无法使用 asyncio.run，此时改为逐个顺序导入
 
         :param md_folder: MD文件夹路径
         :param notebook_name: 目标笔记本名称
@@ -289,6 +201,24 @@ class MarkdownImporter:
         :param convert_soft_breaks: 是否将软回车转换为硬回车
         :return: 导入结果统计
         """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.import_md_files_async(
+                md_folder, notebook_name, parent_folder, upload_media, convert_soft_breaks
+            ))
+
+        logger.warning("检测到正在运行的事件循环，改为顺序导入；异步调用方可直接 await import_md_files_async")
+        return self._import_md_files_sequential(
+            md_folder, notebook_name, parent_folder, upload_media, convert_soft_breaks
+        )
+
+    def _prepare_import(self, md_folder: str, notebook_name: str, parent_folder: str = None):
+        """
+        导入前的准备：检查文件夹、获取笔记本、创建父文件夹并列出MD文件
+
+        :return: (笔记本ID, MD文件列表, 规范化的父文件夹路径)；无法继续导入时返回结果统计字典
+        """
         md_path = Path(md_folder)
         if not md_path.exists():
             logger.error(f"MD文件夹不存在: {md_folder}")
@@ -316,55 +246,120 @@ class MarkdownImporter:
         # if upload_media:
         #     logger.info("启用媒体文件上传功能")
 
-        success_count = 0
-        error_count = 0
-        total_media_uploaded = 0
+        # 规范化父文件夹路径，确保多级路径格式正确
+        clean_parent_folder = parent_folder.strip().strip('/') if parent_folder else ""
+        return notebook_id, md_files, clean_parent_folder
 
-        for md_file in md_files:
-            try:
-                # 读取MD文件内容
-                with open(md_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                # 转换软回车为硬回车（如果启用）
-                if convert_soft_breaks:
-                    content = self.convert_soft_breaks_to_hard_breaks(content)
-
-                # 处理媒体文件（如果启用）
-                if upload_media:
-                    original_content = content
-                    content = self.process_markdown_media(content, md_file)
-                    # 简单统计媒体文件数量变化
-                    if content != original_content:
-                        total_media_uploaded += content.count('assets/') - original_content.count('assets/')
-
-                # 使用文件名作为文档标题
-                title = md_file.stem
-
-                # 构建文档路径
-                if parent_folder:
-                    # 处理多级路径，确保路径格式正确
-                    clean_parent_folder = parent_folder.strip().strip('/')
-                    doc_path = f"/{clean_parent_folder}/{title}"
-                else:
-                    doc_path = f"/{title}"
-
-                # 创建文档
-                doc_id = self.document_manager.create_doc_with_md(
-                    notebook_id=notebook_id,
-                    path=doc_path,
-                    markdown=content
+    def _import_md_files_sequential(self, md_folder: str, notebook_name: str, parent_folder: str = None, upload_media: bool = True, convert_soft_breaks: bool = True) -> dict:
+        """
+        逐个顺序导入MD文件，供已运行事件循环中的同步调用使用
+
+        参数与返回值同 import_md_files
+        """
+        prepared = self._prepare_import(md_folder, notebook_name, parent_folder)
+        if isinstance(prepared, dict):
+            return prepared
+        notebook_id, md_files, clean_parent_folder = prepared
+
+        outcomes = []
+        with ThreadPoolExecutor(max_workers=self.MAX_UPLOAD_WORKERS) as upload_executor:
+            for md_file in md_files:
+                try:
+                    content, media_uploaded = self._prepare_md_file(
+                        md_file, upload_media, convert_soft_breaks, upload_executor
+                    )
+                    title = md_file.stem
+                    doc_id = self.document_manager.create_doc_with_md(
+                        notebook_id=notebook_id,
+                        path=f"/{clean_parent_folder}/{title}" if clean_parent_folder else f"/{title}",
+                        markdown=content
+                    )
+                    if doc_id:
+                        logger.info(f"成功导入: {title}\n")
+                    outcomes.append((bool(doc_id), media_uploaded))
+                except Exception as e:
+                    outcomes.append(e)
+
+        return self._summarize_import(md_files, outcomes, upload_media)
+
+    async def import_md_files_async(self, md_folder: str, notebook_name: str, parent_folder: str = None, upload_media: bool = True, convert_soft_breaks: bool = True) -> dict:
+        """
+        批量并发导入MD文件到思源笔记
+
+        :param md_folder: MD文件夹路径
+        :param notebook_name: 目标笔记本名称
+        :param parent_folder: 父文件夹名称（可选）
+        :param upload_media: 是否上传媒体文件
+        :param convert_soft_breaks: 是否将软回车转换为硬回车
+        :return: 导入结果统计
+        """
+        from .async_api_client import AsyncSiyuanAPI
+
+        prepared = self._prepare_import(md_folder, notebook_name, parent_folder)
+        if isinstance(prepared, dict):
+            return prepared
+        notebook_id, md_files, clean_parent_folder = prepared
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_IMPORTS)
+
+        # 所有文档共用一个上传线程池，媒体上传的总并发不超过 MAX_UPLOAD_WORKERS（小于连接池 pool_maxsize）
+        with ThreadPoolExecutor(max_workers=self.MAX_UPLOAD_WORKERS) as upload_executor:
+            async with AsyncSiyuanAPI(self.api) as async_api:
+                async def import_one(md_file: Path) -> Tuple[bool, int]:
+                    async with semaphore:
+                        # 文件读取与媒体上传是阻塞操作，放到线程池中执行
+                        content, media_uploaded = await loop.run_in_executor(
+                            None, self._prepare_md_file, md_file, upload_media, convert_soft_breaks,
+                            upload_executor
+                        )
+
+                        # 使用文件名作为文档标题
+                        title = md_file.stem
+                        doc_path = f"/{clean_parent_folder}/{title}" if clean_parent_folder else f"/{title}"
+
+                        doc_id = await self.document_manager.create_doc_with_md_async(
+                            async_api,
+                            notebook_id=notebook_id,
+                            path=doc_path,
+                            markdown=content
+                        )
+
+                        if doc_id:
+                            logger.info(f"成功导入: {title}\n")
+                            return True, media_uploaded
+
+                        logger.error(f"导入失败: {title}")
+                        return False, media_uploaded
+
+                outcomes = await asyncio.gather(
+                    *(import_one(md_file) for md_file in md_files), return_exceptions=True
                 )
 
-                if doc_id:
-                    logger.info(f"成功导入: {title}\n")
-                    success_count += 1
-                else:
-                    logger.error(f"导入失败: {title}")
-                    error_count += 1
+        return self._summarize_import(md_files, outcomes, upload_media)
 
-            except Exception as e:
-                logger.error(f"导入失败 {md_file.name}: {e}")
+    def _summarize_import(self, md_files: list, outcomes: list, upload_media: bool) -> dict:
+        """
+        汇总各文件的导入结果
+
+        :param md_files: MD文件列表
+        :param outcomes: 与md_files顺序一致的 (是否成功, 上传的媒体数) 或异常
+        :param upload_media: 是否上传了媒体文件
+        :return: 导入结果统计
+        """
+        success_count = 0
+        error_count = 0
+        total_media_uploaded = 0
+        for md_file, outcome in zip(md_files, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"导入失败 {md_file.name}: {outcome}")
+                error_count += 1
+                continue
+            ok, media_uploaded = outcome
+            total_media_uploaded += media_uploaded
+            if ok:
+                success_count += 1
+            else:
                 error_count += 1
 
         result = {
@@ -383,53 +378,59 @@ class MarkdownImporter:
 
     def _create_parent_folder(self, notebook_id: str, parent_folder: str) -> Optional[str]:
         """检查父文件夹是否存在，如果不存在则创建（支持多级路径）"""
-        # 标准化路径，确保以/开头，去掉末尾的/
-        parent_path = parent_folder.strip()
-        if not parent_path.startswith('/'):
-            parent_path = f"/{parent_path}"
-        parent_path = parent_path.rstrip('/')
-
-        # 先检查完整路径的父文档是否已存在
-        existing_ids = self.document_manager.get_ids_by_hpath(parent_path, notebook_id)
-
-        if existing_ids:
-            logger.info(f"父文档已存在: {parent_path} -> {existing_ids[0]}")
-            return existing_ids[0]
-
-        # 如果路径包含多级，需要递归创建父级目录
-        path_parts = [part for part in parent_path.split('/') if part]
-
-        if len(path_parts) > 1:
-            # 递归创建上级目录
-            parent_path_parts = path_parts[:-1]
-            upper_parent_path = '/' + '/'.join(parent_path_parts)
-
-            # logger.info(f"检查上级路径: {upper_parent_path}")
-            self._create_parent_folder(notebook_id, upper_parent_path)
+        # 标准化路径，拆分出各级祖先路径，例如 /a/b/c -> ["/a", "/a/b", "/a/b/c"]
+        path_parts = [part for part in parent_folder.strip().split('/') if part]
+        if not path_parts:
+            return None
+        ancestor_paths = ['/' + '/'.join(path_parts[:i]) for i in range(1, len(path_parts) + 1)]
+
+        # 一次SQL查询所有层级，命中即可确认存在；SQL索引异步更新，未命中的层级不能据此断定不存在
+        existing = self.document_manager.get_ids_by_hpaths(ancestor_paths, notebook_id)
+
+        parent_path = ancestor_paths[-1]
+        if parent_path in existing:
+            logger.info(f"父文档已存在: {parent_path} -> {existing[parent_path]}")
+            return existing[parent_path]
+
+        # 自上而下处理未命中的层级：先用 getIDsByHPath 确认，确认缺失后该层及其下各层都需要创建
+        doc_id = None
+        confirmed_missing = False
+        for level_path, folder_name in zip(ancestor_paths, path_parts):
+            if level_path in existing:
+                doc_id = existing[level_path]
+                continue
+            if not confirmed_missing:
+                level_ids = self.document_manager.get_ids_by_hpath(level_path, notebook_id)
+                if level_ids:
+                    doc_id = level_ids[0]
+                    continue
+                confirmed_missing = True
+            doc_id = self._create_folder_doc(notebook_id, level_path, folder_name)
+            if not doc_id:
+                return None
+        return doc_id
 
-        # 创建当前级别的文档
+    def _create_folder_doc(self, notebook_id: str, folder_path: str, folder_name: str) -> Optional[str]:
+        """创建单个层级的父文档"""
         try:
-            # 获取当前级别的文件夹名
-            folder_name = path_parts[-1] if path_parts else parent_folder
-
             doc_id = self.document_manager.create_doc_with_md(
                 notebook_id=notebook_id,
-                path=parent_path,
+                path=folder_path,
                 markdown=f"# {folder_name}\n\n这是导入文档的集合文件夹。"
             )
 
             if doc_id:
-                logger.info(f"创建父文档: {parent_path} -> {doc_id}")
+                logger.info(f"创建父文档: {folder_path} -> {doc_id}")
                 return doc_id
             else:
-                logger.error(f"创建父文档失败: {parent_path}")
+                logger.error(f"创建父文档失败: {folder_path}")
                 return None
 
         except Exception as e:
             logger.warning(f"创建父文档时出错: {e}")
             # 再次尝试检查是否已存在（可能是并发创建或API延迟）
-            existing_ids = self.document_manager.get_ids_by_hpath(parent_path, notebook_id)
+            existing_ids = self.document_manager.get_ids_by_hpath(folder_path, notebook_id)
             if existing_ids:
-                logger.info(f"父文档已存在（重新检查）: {parent_path} -> {existing_ids[0]}")
+                logger.info(f"父文档已存在（重新检查）: {folder_path} -> {existing_ids[0]}")
                 return existing_ids[0]
             return None
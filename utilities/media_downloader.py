@@ -4,10 +4,11 @@
 """
 
 import asyncio
+from contextlib import asynccontextmanager
 import aiohttp
 import aiofiles
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Set, Tuple
+from typing import Optional, Dict, List, Tuple
 import logging
 import re
 import hashlib
@@ -54,6 +55,9 @@ class MediaDownloader:
         # 微信CDN域名列表（需要 Referer 才能下载图片）
         self._weixin_cdn_domains = {'mmbiz.qpic.cn', 'mmbiz.qlogo.cn'}
 
+        # shared_session() 上下文内复用的aiohttp会话
+        self._session = None
+
     def _get_headers_for_url(self, url: str) -> dict:
         """
         根据URL域名返回合适的请求头。
@@ -215,6 +219,29 @@ class MediaDownloader:
         ext = Path(urlparse(url).path).suffix.lower()
         return ext in (self.supported_image_types | self.supported_video_types | self.supported_audio_types)
 
+    def _create_session(self) -> aiohttp.ClientSession:
+        """创建媒体下载用的aiohttp会话"""
+        connector = aiohttp.TCPConnector(limit=self.max_workers)
+        timeout = aiohttp.ClientTimeout(total=30, connect=10)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    @asynccontextmanager
+    async def shared_session(self):
+        """
+        在上下文内让所有批量下载复用同一个aiohttp会话，
+        多篇文章的媒体常来自同一CDN，可保持连接而不必每篇重新握手
+        """
+        if self._session is not None:
+            yield self._session
+            return
+
+        self._session = self._create_session()
+        try:
+            yield self._session
+        finally:
+            session, self._session = self._session, None
+            await session.close()
+
     async def download_media_batch(self, urls: List[str], base_url: str = "") -> Dict[str, str]:
         """
         批量下载媒体文件
@@ -223,30 +250,49 @@ class MediaDownloader:
         :param base_url: 基础URL
         :return: URL到本地路径的映射
         """
-        url_to_local = {}
-
         if not urls:
-            return url_to_local
+            return {}
 
-        # 创建异步会话
-        connector = aiohttp.TCPConnector(limit=self.max_workers)
-        timeout = aiohttp.ClientTimeout(total=30, connect=10)
+        # 在 shared_session() 内复用共享会话，否则为本批次创建临时会话
+        if self._session is not None:
+            return await self._download_batch_with_session(self._session, urls, base_url)
+
+        async with self._create_session() as session:
+            return await self._download_batch_with_session(session, urls, base_url)
+
+    async def _download_batch_with_session(self, session: aiohttp.ClientSession, urls: List[str],
+                                           base_url: str) -> Dict[str, str]:
+        """
+        使用给定会话并发下载一批媒体文件
+
+        :param session: aiohttp会话
+        :param urls: 媒体文件URL列表
+        :param base_url: 基础URL
+        :return: URL到本地路径的映射
+        """
+        url_to_local = {}
 
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            # 创建下载任务
-            tasks = []
-            for url in urls:
-                task = asyncio.create_task(self.download_media_async(session, url, base_url))
-                tasks.append((url, task))
+        # 创建下载任务
+        tasks = []
+        for url in urls:
+            task = asyncio.create_task(self.download_media_async(session, url, base_url))
+            tasks.append((url, task))
 
-            # 执行下载
+        # 执行下载；超时被取消时一并取消未完成的任务，避免它们继续占用共享会话
+        try:
             for original_url, task in tasks:
                 try:
                     result = await task
                     if result:
                         local_path, relative_path = result
                         url_to_local[original_url] = relative_path
+                except asyncio.CancelledError:
+                    raise
                 except Exception as e:
                     logger.error(f"下载任务失败: {original_url}, 错误: {e}")
+        except asyncio.CancelledError:
+            for _, task in tasks:
+                task.cancel()
+            raise
 
-        return url_to_local
\ No newline at end of file
+        return url_to_local
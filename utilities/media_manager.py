@@ -1,22 +1,43 @@
 """
 媒体文件管理器
 """
+import os
 import requests
 from pathlib import Path
 from typing import Optional
-from .common import logger
+from .common import logger, json_loads
+
+try:
+    from requests_toolbelt import MultipartEncoder
+    HAS_TOOLBELT = True
+except ImportError:
+    HAS_TOOLBELT = False
+
+
+# 支持的媒体文件扩展名
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.bmp', '.ico'})
+AUDIO_EXTENSIONS = frozenset({'.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac'})
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.mov', '.avi', '.mkv', '.webm', '.wmv', '.flv'})
+
+# 扩展名 -> 媒体类型
+MEDIA_EXTENSION_TYPES = {
+    **dict.fromkeys(IMAGE_EXTENSIONS, 'image'),
+    **dict.fromkeys(AUDIO_EXTENSIONS, 'audio'),
+    **dict.fromkeys(VIDEO_EXTENSIONS, 'video'),
+}
 
 
 class MediaManager:
     """媒体文件管理类"""
 
+    # 扩展名集合为不可变常量，所有实例共享
+    image_extensions = IMAGE_EXTENSIONS
+    audio_extensions = AUDIO_EXTENSIONS
+    video_extensions = VIDEO_EXTENSIONS
+    all_media_extensions = IMAGE_EXTENSIONS | AUDIO_EXTENSIONS | VIDEO_EXTENSIONS
+
     def __init__(self, api_client):
         self.api = api_client
-        # 支持的媒体文件扩展名
-        self.image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.bmp', '.ico'}
-        self.audio_extensions = {'.mp3', '.wav', '.m4a', '.aac', '.ogg', '.flac'}
-        self.video_extensions = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.wmv', '.flv'}
-        self.all_media_extensions = self.image_extensions | self.audio_extensions | self.video_extensions
 
     def upload_asset(self, file_path: str, assets_dir: str = "/assets/") -> Optional[str]:
         """
@@ -32,32 +53,37 @@ class MediaManager:
                 logger.error(f"文件不存在: {file_path}")
                 return None
 
-            # 准备multipart表单数据
+            # 准备multipart表单数据；安装了 requests-toolbelt 时流式编码，大文件不必整体读入内存
             with open(file_path, 'rb') as f:
-                files = {
-                    'file[]': (file_path.name, f, 'application/octet-stream')
-                }
-
-                data = {
+                fields = {
+                    'file[]': (file_path.name, f, 'application/octet-stream'),
                     'assetsDirPath': assets_dir
                 }
+                if HAS_TOOLBELT:
+                    encoder = MultipartEncoder(fields=fields)
+                    body = {'data': encoder}
+                    headers = {'Content-Type': encoder.content_type}
+                else:
+                    body = {'files': {'file[]': fields['file[]']}, 'data': {'assetsDirPath': assets_dir}}
+                    # 不设置Content-Type，让requests自动生成multipart边界
+                    headers = {'Content-Type': None}
 
-                # 准备请求头（不包含Content-Type，让requests自动设置）
-                headers = {}
-                if self.api.api_token:
-                    headers['Authorization'] = f'Token {self.api.api_token}'
+                url = f"{self.api.api_url}/api/asset/upload"
+                session = getattr(self.api, 'session', None)
+                if isinstance(session, requests.Session):
+                    # 复用API客户端的连接池，覆盖会话默认的JSON Content-Type；认证头逐请求传入
+                    headers.update(self.api.auth_headers())
+                    response = session.post(url, headers=headers, timeout=60, **body)
+                else:
+                    headers = {k: v for k, v in headers.items() if v is not None}
+                    if self.api.api_token:
+                        headers['Authorization'] = f'Token {self.api.api_token}'
 
-                # 发送上传请求
-                response = requests.post(
-                    f"{self.api.api_url}/api/asset/upload",
-                    headers=headers,
-                    files=files,
-                    data=data,
-                    timeout=60
-                )
+                    # 发送上传请求
+                    response = requests.post(url, headers=headers, timeout=60, **body)
 
             response.raise_for_status()
-            result = response.json()
+            result = json_loads(response.content)
 
             if result.get('code') != 0:
                 logger.error(f"上传文件失败: {result.get('msg', '未知错误')}")
@@ -80,16 +106,8 @@ class MediaManager:
 
     def is_media_file(self, file_path: str) -> bool:
         """判断是否为媒体文件"""
-        return Path(file_path).suffix.lower() in self.all_media_extensions
+        return os.path.splitext(file_path)[1].lower() in MEDIA_EXTENSION_TYPES
 
     def get_media_type(self, file_path: str) -> str:
         """获取媒体文件类型"""
-        ext = Path(file_path).suffix.lower()
-        if ext in self.image_extensions:
-            return 'image'
-        elif ext in self.audio_extensions:
-            return 'audio'
-        elif ext in self.video_extensions:
-            return 'video'
-        else:
-            return 'unknown'
\ No newline at end of file
+        return MEDIA_EXTENSION_TYPES.get(os.path.splitext(file_path)[1].lower(), 'unknown')
\ No newline at end of file
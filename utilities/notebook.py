@@ -1,6 +1,7 @@
 """
 笔记本管理器
 """
+import time
 from typing import List, Tuple, Optional
 from .common import logger
 
@@ -8,21 +9,47 @@ from .common import logger
 class NotebookManager:
     """笔记本管理类"""
 
+    # 笔记本列表缓存有效期（秒）
+    NOTEBOOKS_CACHE_TTL = 60
+
     def __init__(self, api_client):
         self.api = api_client
+        self._notebooks_cache = None
+        self._notebooks_cache_ts = 0.0
+        self._name_to_id = {}
+        self._id_to_name = {}
+
+    def invalidate(self) -> None:
+        """清空笔记本列表缓存，在重命名/删除/打开笔记本后调用"""
+        self._notebooks_cache = None
+        self._notebooks_cache_ts = 0.0
+        self._name_to_id = {}
+        self._id_to_name = {}
 
     def list_notebooks(self) -> List[Tuple[str, str]]:
         """
-        获取所有笔记本列表
+        获取所有笔记本列表（结果缓存 NOTEBOOKS_CACHE_TTL 秒）
 
         :return: 笔记本(ID, 名称)的列表
         """
+        if (self._notebooks_cache is not None and
+                time.monotonic() - self._notebooks_cache_ts < self.NOTEBOOKS_CACHE_TTL):
+            logger.debug(f"使用缓存的笔记本列表（{len(self._notebooks_cache)} 个笔记本）")
+            return self._notebooks_cache
+
         logger.info("正在获取笔记本列表...")
         data = self.api.call_api("/api/notebook/lsNotebooks")
 
         if data and "notebooks" in data:
             notebooks = data["notebooks"]
             logger.info(f"找到 {len(notebooks)} 个笔记本")
+            self._notebooks_cache = notebooks
+            self._notebooks_cache_ts = time.monotonic()
+            self._name_to_id = {}
+            self._id_to_name = {}
+            for notebook in notebooks:
+                self._name_to_id.setdefault(notebook["name"], notebook["id"])
+                self._id_to_name[notebook["id"]] = notebook["name"]
             return notebooks
 
         logger.warning("未找到笔记本")
@@ -41,6 +68,11 @@ class NotebookManager:
         if data and "notebook" in data:
             notebook_id = data["notebook"]["id"]
             logger.info(f"成功创建笔记本: {name} -> {notebook_id}")
+            if self._notebooks_cache is not None:
+                # 直接把新笔记本加入缓存，后续按名称查找无需重新请求列表
+                self._notebooks_cache = self._notebooks_cache + [data["notebook"]]
+                self._name_to_id.setdefault(name, notebook_id)
+                self._id_to_name[notebook_id] = name
             return notebook_id
 
         logger.error(f"创建笔记本失败: {name}")
@@ -69,16 +101,11 @@ class NotebookManager:
         :return: 笔记本ID，如果找不到则返回None
         """
         # logger.info(f"正在获取笔记本 '{name}' 的ID...")
-        notebooks = self.list_notebooks()
-
-        for notebook in notebooks:
-            notebook_id = notebook["id"]
-            notebook_name = notebook["name"]
-            notebook_closed = notebook["closed"]
+        self.list_notebooks()
 
-            if notebook_name == name:
-                # logger.info(f"找到笔记本 '{name}' 的ID: {notebook_id}")
-                return notebook_id
+        notebook_id = self._name_to_id.get(name)
+        if notebook_id:
+            return notebook_id
 
         logger.error(f"未能找到名为 '{name}' 的笔记本")
         return None
@@ -90,11 +117,8 @@ class NotebookManager:
         :param notebook_id: 笔记本ID
         :return: 笔记本名称
         """
-        notebooks = self.list_notebooks()
-        for notebook in notebooks:
-            if notebook["id"] == notebook_id:
-                return notebook["name"]
-        return f'未知笔记本-{notebook_id}'
+        self.list_notebooks()
+        return self._id_to_name.get(notebook_id, f'未知笔记本-{notebook_id}')
 
     def open_notebook(self, notebook_id: str) -> bool:
         """
@@ -108,6 +132,7 @@ class NotebookManager:
 
         if result is not None:
             logger.info('笔记本已打开')
+            self.invalidate()
             return True
 
         logger.error('打开笔记本失败')
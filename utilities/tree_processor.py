@@ -15,31 +15,31 @@ class TreeProcessor:
         :param node: 节点数据
         :return: 是否为叶子节点
         """
-        return isinstance(node, dict) and all(
-            not isinstance(v, dict) for v in node.values()
-        )
+        if not isinstance(node, dict):
+            return False
+        # 遇到第一个字典值即可判定为目录节点，避免生成器表达式的额外开销
+        for value in node.values():
+            if isinstance(value, dict):
+                return False
+        return True
 
     @staticmethod
     def count_documents(tree: Dict[str, Any]) -> int:
         """
-        递归计算文档数量
+        计算文档数量（基于显式栈的迭代遍历，字符串叶子直接计数，不复制子树字典）
 
         :param tree: 文档树
         :return: 文档数量
         """
         count = 0
-        for key, value in tree.items():
-            if isinstance(value, str):
-                # 这是一个docGuid-title对
-                count += 1
-            elif isinstance(value, dict):
-                if '__self__' in value:
-                    # 这是一个有自身GUID的目录，先计算自身
-                    count += TreeProcessor.count_documents(value['__self__'])
-                    # 再递归计算子目录中的文档数量
-                    remaining_items = {k: v for k, v in value.items() if k != '__self__'}
-                    count += TreeProcessor.count_documents(remaining_items)
-                else:
-                    # 递归计算子目录中的文档数量
-                    count += TreeProcessor.count_documents(value)
-        return count
\ No newline at end of file
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            for value in node.values():
+                if isinstance(value, str):
+                    # 这是一个docGuid-title对
+                    count += 1
+                elif isinstance(value, dict):
+                    # 目录节点（包括有自身GUID的 '__self__' 字典），入栈继续遍历
+                    stack.append(value)
+        return count
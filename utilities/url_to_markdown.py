@@ -614,50 +614,50 @@ class URLToMarkdownConverter:
         successful_files = []
         failed_items: List[Dict[str, str]] = []
         if deduplicated_items:
-            for i, item in enumerate(deduplicated_items, 1):
-                url = item["url"]
-                try:
-                    # 检查是否是飞书链接，如果是则显示特殊提示
-                    if url.startswith("https://waytoagi.feishu.cn/"):
-                        logger.info(f"\n[{i}/{len(deduplicated_items)}] 正在处理飞书链接: {url}")
-                        logger.info("  🔍 检测飞书链接，将自动提取微信原文链接...")
-                    else:
-                        logger.info(f"\n[{i}/{len(deduplicated_items)}] 正在转换: {url}")
+            # 同一批次的所有URL复用一个媒体下载会话
+            async with self.media_downloader.shared_session():
+                for i, item in enumerate(deduplicated_items, 1):
+                    url = item["url"]
+                    try:
+                        # 检查是否是飞书链接，如果是则显示特殊提示
+                        if url.startswith("https://waytoagi.feishu.cn/"):
+                            logger.info(f"\n[{i}/{len(deduplicated_items)}] 正在处理飞书链接: {url}")
+                            logger.info("  🔍 检测飞书链接，将自动提取微信原文链接...")
+                        else:
+                            logger.info(f"\n[{i}/{len(deduplicated_items)}] 正在转换: {url}")
 
-                    output_filename = None
-                    if item.get("title"):
-                        output_filename = self.generate_filename(item["title"], url)
+                        output_filename = None
+                        if item.get("title"):
+                            output_filename = self.generate_filename(item["title"], url)
 
-                    # 转换URL为Markdown，不指定文件名，让系统自动生成
-                    result_path = await self.convert_url_to_markdown(
-                        url=url,
-                        output_filename=output_filename,
-                        download_media=download_media
-                    )
+                        # 转换URL为Markdown，不指定文件名，让系统自动生成
+                        result_path = await self.convert_url_to_markdown(
+                            url=url,
+                            output_filename=output_filename,
+                            download_media=download_media
+                        )
 
-                    if result_path:
-                        successful_files.append(result_path)
-                        file_size = result_path.stat().st_size
-                        # logger.info(f"    ✓ 转换成功! 文件: {result_path.name} ({file_size:,} 字节)")
-                    else:
-                        logger.error(f"    ✗ 转换失败: {url}")
-                        last_error = self.last_error or {}
+                        if result_path:
+                            successful_files.append(result_path)
+                        else:
+                            logger.error(f"    ✗ 转换失败: {url}")
+                            last_error = self.last_error or {}
+                            failed_items.append({
+                                "url": url,
+                                "message": last_error.get("message", "转换失败，未返回具体错误"),
+                                "stage": last_error.get("stage", ""),
+                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                            })
+
+                    except Exception as e:
+                        logger.error(f"    ✗ 转换出错: {url}, 错误: {e}")
                         failed_items.append({
                             "url": url,
-                            "message": last_error.get("message", "转换失败，未返回具体错误"),
-                            "stage": last_error.get("stage", ""),
+                            "message": str(e),
+                            "stage": "batch_loop",
                             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                         })
 
-                except Exception as e:
-                    logger.error(f"    ✗ 转换出错: {url}, 错误: {e}")
-                    failed_items.append({
-                        "url": url,
-                        "message": str(e),
-                        "stage": "batch_loop",
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    })
-
             logger.info(f"\n批量转换完成! 成功: {len(successful_files)}/{len(deduplicated_items)}")
         else:
             logger.warning("没有找到有效的URL")
@@ -4,6 +4,7 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 import re
 import html
@@ -24,14 +25,27 @@ try:
 except ImportError:
     HAS_BROTLI = False
 
+# 编码检测优先使用C实现的 cchardet，其次 chardet，最后是 requests 自带依赖 charset_normalizer，
+# 三者都提供兼容的 detect() 接口
 try:
-    import chardet
+    import cchardet as chardet
     HAS_CHARDET = True
 except ImportError:
-    HAS_CHARDET = False
+    try:
+        import chardet
+        HAS_CHARDET = True
+    except ImportError:
+        try:
+            import charset_normalizer as chardet
+            HAS_CHARDET = True
+        except ImportError:
+            HAS_CHARDET = False
 
 logger = logging.getLogger(__name__)
 
+# 编码检测只看页面开头的字节，charset 声明与检测所需样本都在这一范围内
+ENCODING_SNIFF_BYTES = 64 * 1024
+
 
 class WebDownloader:
     """网页下载器"""
@@ -70,6 +84,12 @@ class WebDownloader:
             }
         }
 
+        # 复用连接的会话，同一站点的后续请求省去TCP与TLS握手；请求头按站点逐次传入
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
     def _get_site_specific_headers(self, url: str) -> Dict[str, str]:
         """获取针对特定网站的请求头"""
         parsed_url = urlparse(url)
@@ -103,15 +123,17 @@ class WebDownloader:
         if response_encoding and response_encoding.lower() not in ['iso-8859-1', 'ascii']:
             return response_encoding
 
+        head = content[:ENCODING_SNIFF_BYTES]
+
         # 使用chardet检测
         if HAS_CHARDET:
-            detected = chardet.detect(content)
+            detected = chardet.detect(head)
             if detected['encoding'] and detected['confidence'] > 0.7:
                 return detected['encoding']
 
         # 尝试从HTML meta标签中提取编码
         try:
-            content_str = content.decode('utf-8', errors='ignore')
+            content_str = head.decode('utf-8', errors='ignore')
             charset_match = re.search(r'<meta[^>]*charset[="\s]*([^">\s]+)', content_str, re.IGNORECASE)
             if charset_match:
                 return charset_match.group(1)
@@ -239,7 +261,7 @@ class WebDownloader:
 
                 # 先获取飞书页面内容
                 headers = self._get_site_specific_headers(url)
-                response = requests.get(url, headers=headers, timeout=30)
+                response = self.session.get(url, headers=headers, timeout=30)
                 response.raise_for_status()
 
                 # 获取原始内容并解码
@@ -273,7 +295,7 @@ class WebDownloader:
             headers = self._get_site_specific_headers(url)
 
             # logger.info(f"正在获取网页内容: {url}")
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self.session.get(url, headers=headers, timeout=30)
             response.raise_for_status()
 
             # 获取原始内容
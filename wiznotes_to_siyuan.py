@@ -5,7 +5,6 @@
 3. 将MD目录下的md文件移动到"已转思源"目录
 """
 
-import os
 import sys
 from pathlib import Path
 import shutil
@@ -15,7 +14,7 @@ import export_wiznotes_to_md
 import create_notes_from_md
 
 # 导入日志模块
-from utilities import setup_logging
+from utilities import setup_logging, get_env
 
 # 导入配置模块
 from config import get_config, get_wiznotes_path
@@ -72,7 +71,7 @@ def step3_move_files():
     logger.info("\n=== 步骤3：移动已导入笔记到\"已转思源\"目录 ===")
 
     # 获取MD文件夹路径
-    md_folder = os.getenv("MD_FOLDER", str(get_wiznotes_path()))
+    md_folder = get_env("MD_FOLDER", str(get_wiznotes_path()))
     md_path = Path(md_folder)
 
     if not md_path.exists():